@@ -1,73 +1,298 @@
 import os
 import io
+import json
+import time
+import threading
 import traceback
-from flask import Flask, render_template, request, send_file
-import google.generativeai as genai
-from xhtml2pdf import pisa
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeoutError
+from flask import Flask, Blueprint, render_template, request, send_file, jsonify, Response, stream_with_context, url_for, g, session
+from flask import before_render_template, template_rendered
+from werkzeug.utils import secure_filename
 from dotenv import load_dotenv
+from cache import MemoryBackend, RecommendationCache, make_cache_key
+from model_backends import LazyModel, create_model_from_env
+from recommendation_parser import RecommendationParser, parse_recommendations
+from structured_output import JsonRecommendationParser, generation_config, parse_structured_recommendations
+from result_store import ResultStore
+from pdf_jobs import PdfJobManager
+from reports import ReportRenderer
+from model_client import AsyncModelClient
+from model_pool import ModelPool
+from batch import detect_format, open_upload, read_profiles, run_batch
+from export import iter_zip, render_exports
+from rate_limit import AdmissionController, ServiceBusy
+from metrics import REGISTRY, REQUEST_SECONDS, STAGE_SECONDS, RequestProfiler, current_route, timed
 
 # Load environment variables from .env file
 load_dotenv()
 
-app = Flask(__name__)
-app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key")
-
-# Initialize Gemini API
-api_key = os.getenv("GEMINI_API_KEY")
-if not api_key:
-    raise ValueError("No GEMINI_API_KEY found in environment variables. Please check your .env file.")
+# Routes live on a blueprint so create_app() can build as many apps as needed
+bp = Blueprint('main', __name__)
+
+# The model (Gemini, a pool of Gemini keys and models, or the offline fake when
+# MODEL_BACKEND=fake) is built on first use, so importing the app doesn't pay
+# for google.generativeai
+model = LazyModel(create_model_from_env)
+
+# Async calls with bounded concurrency; identical concurrent profiles share one call
+model_client = AsyncModelClient.from_env(model)
+
+# Sheds load once too many requests are already waiting on the model
+admission = AdmissionController.from_env()
+busy_retry_after = int(os.getenv("BUSY_RETRY_AFTER", 10))
+
+# Cache of parsed recommendations keyed on the normalized profile
+recommendation_cache = RecommendationCache.from_env()
+
+# Generated results, so follow-up routes only need to post back an ID
+result_store = ResultStore.from_env()
+
+# PDF rendering runs in a process pool; finished PDFs are cached by content hash
+pdf_jobs = PdfJobManager.from_env()
+pdf_wait_timeout = float(os.getenv("PDF_WAIT_TIMEOUT", 30))
+
+# Report HTML templates, compiled once at startup
+report_renderer = ReportRenderer()
+
+# Opt-in: once results are shown, render the reports they usually lead to in the
+# background; one thread builds the HTML and hands it to the low-priority PDF pool
+prefetch_enabled = os.getenv("PDF_PREFETCH", "False").lower() == "true"
+prefetch_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='pdf-prefetch')
+# PDF job IDs prefetched for each result, so they can be cancelled once the user moves on
+prefetch_jobs = MemoryBackend(max_entries=1024, ttl=3600)
+
+# Upper bound on the per-request fan-out of /batch
+batch_max_concurrency = int(os.getenv("BATCH_MAX_CONCURRENCY", 4))
+
+# Limits for /export_reports: result sets per request, result sets rendered at
+# once, and how long to wait for one PDF before leaving it out of the archive
+export_max_results = int(os.getenv("EXPORT_MAX_RESULTS", 100))
+export_concurrency = int(os.getenv("EXPORT_CONCURRENCY", 4))
+export_pdf_timeout = float(os.getenv("EXPORT_PDF_TIMEOUT", 120))
+
+# 'text' asks for the TITLE:/PROS: format, 'json' for schema-constrained JSON
+output_format = os.getenv("MODEL_OUTPUT_FORMAT", "text").lower()
+if output_format not in ("text", "json"):
+    raise ValueError(f"Unknown MODEL_OUTPUT_FORMAT: {output_format}")
+
+# Progressive mode: the first call only asks for what the results page shows, and a
+# recommendation's details are generated (and stored) the first time they're needed
+progressive_enabled = os.getenv("PROGRESSIVE_GENERATION", "False").lower() == "true"
+details_lock = threading.Lock()
+
+# Stream recommendations to the loading page over SSE
+stream_enabled = os.getenv("STREAM_GENERATION", "True").lower() == "true"
+
+# cProfile individual requests (PROFILE_REQUESTS, or an X-Profile header matching PROFILE_HEADER_TOKEN)
+profiler = RequestProfiler.from_env()
+
+# Load the model and start the PDF workers before the first request
+warm_up_enabled = os.getenv("WARM_UP", "False").lower() == "true"
+
+def collect_stats():
+    """Expose the counters kept by the cache, model client and admission controller on /metrics"""
+    client = model_client.stats()
+    yield 'career_compass_model_in_flight', 'gauge', 'Model calls currently in flight', client['in_flight']
+    yield 'career_compass_model_coalesced_total', 'counter', 'Requests served by joining an in-flight call', client['coalesced']
+    yield 'career_compass_model_retries_total', 'counter', 'Model calls retried after an error', client['retries']
+    yield 'career_compass_admission_pending', 'gauge', 'Requests waiting on the model', admission.pending
+    yield 'career_compass_admission_rejected_total', 'counter', 'Requests shed with a busy page', admission.rejected
+    pdf = pdf_jobs.stats()
+    yield 'career_compass_pdf_prefetch_submitted_total', 'counter', 'PDFs queued for speculative rendering', pdf['prefetch_submitted']
+    yield 'career_compass_pdf_prefetch_used_total', 'counter', 'Downloads that found their PDF prefetched', pdf['prefetch_used']
+    yield 'career_compass_pdf_prefetch_discarded_total', 'counter', 'Prefetched PDFs cancelled or evicted unused', pdf['prefetch_discarded']
+    yield 'career_compass_pdf_prefetch_bytes', 'gauge', 'Memory held by prefetched PDFs not yet downloaded', pdf['prefetch_bytes']
+    if recommendation_cache:
+        cache = recommendation_cache.stats()
+        yield 'career_compass_cache_hits_total', 'counter', 'Recommendation cache hits', cache['hits']
+        yield 'career_compass_cache_misses_total', 'counter', 'Recommendation cache misses', cache['misses']
+        yield 'career_compass_cache_evictions_total', 'counter', 'Recommendation cache evictions', cache['evictions']
+        yield 'career_compass_cache_entries', 'gauge', 'Profiles in the recommendation cache', cache['size']
+        yield 'career_compass_cache_near_hits_total', 'counter', 'Cache hits served from a near-duplicate profile', cache['near_hits']
+        similarity = cache['similarity']
+        if similarity:
+            yield 'career_compass_similarity_entries', 'gauge', 'Profiles in the near-duplicate index', similarity['entries']
+            yield 'career_compass_similarity_evictions_total', 'counter', 'Near-duplicate index evictions', similarity['evictions']
+            yield 'career_compass_similarity_bytes', 'gauge', 'Estimated memory of the near-duplicate index', similarity['approx_bytes']
+
+REGISTRY.add_collector(collect_stats)
+
+@bp.before_app_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+    g.profile = profiler.start() if profiler.wanted(request.headers) else None
+
+@bp.after_app_request
+def record_request(response):
+    # Recorded when the response is closed, so streamed bodies are timed to their last chunk
+    started = g.pop('request_started', None)
+    if started is None:
+        return response
+    profile = g.pop('profile', None)
+    route, method, status = current_route(), request.method, response.status_code
+
+    def finish():
+        REQUEST_SECONDS.observe(time.perf_counter() - started, route, method, status)
+        if profile is not None:
+            profiler.stop(profile, route)
+
+    if response.direct_passthrough:
+        # send_file hands the server a file wrapper that bypasses close callbacks
+        finish()
+    else:
+        response.call_on_close(finish)
+    return response
+
+@bp.teardown_app_request
+def stop_orphaned_profile(error=None):
+    # after_request is skipped if the request fails outright; don't leave the profiler busy
+    profile = g.pop('profile', None)
+    if profile is not None:
+        profiler.stop(profile, current_route())
+
+def start_template_timer(sender, template, context, **extra):
+    g.template_started = time.perf_counter()
+
+def record_template_time(sender, template, context, **extra):
+    started = g.pop('template_started', None)
+    if started is not None:
+        STAGE_SECONDS.observe(time.perf_counter() - started, current_route(), 'render_template')
+
+def build_prompt(user_data, fmt=None):
+    """Build the Gemini prompt for the user's goal in the given output format"""
+    if (fmt or output_format) == "json":
+        return build_json_prompt(user_data)
+    if user_data['goal'] == "Higher Studies":
+        prompt = f"""
+        Act as a career counselor specializing in higher education. Provide 3 detailed recommendations for a student based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+        
+        For each recommendation, provide this exact format:
+        --- RECOMMENDATION 1
+        TITLE: [Recommendation title]
+        OVERVIEW: [Brief overview]
+        DETAILS: [Detailed description]
+        PROS: [comma, separated, list]
+        CONS: [comma, separated, list]
+        INSTITUTIONS: [comma, separated, list of top institutions]
+        RESOURCES: [comma, separated, list of resources]
+        """
+    else:
+        prompt = f"""
+        Act as a career counselor specializing in job placements. Provide 3 detailed career recommendations for a job seeker based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+        
+        For each recommendation, provide this exact format:
+        --- RECOMMENDATION 1
+        TITLE: [Job title/role]
+        OVERVIEW: [Brief overview]
+        DETAILS: [Detailed description]
+        PROS: [comma, separated, list]
+        CONS: [comma, separated, list]
+        COMPANIES: [comma, separated, list of top companies]
+        SALARY: [Salary range]
+        GROWTH: [Growth potential]
+        SKILLS NEEDED: [comma, separated, list]
+        RESOURCES: [comma, separated, list of resources]
+        """
+    return prompt
+
+def build_json_prompt(user_data):
+    """Prompt for JSON mode: the response schema describes the fields, so no format template is needed"""
+    if user_data['goal'] == "Higher Studies":
+        return f"""
+        Act as a career counselor specializing in higher education. Provide 3 detailed recommendations for a student based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+
+        For each give a title, a brief overview, a detailed description as details, pros, cons, top institutions and resources.
+        """
+    return f"""
+        Act as a career counselor specializing in job placements. Provide 3 detailed career recommendations for a job seeker based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+
+        For each give the job title/role as title, a brief overview, a detailed description as details, pros, cons,
+        top companies, the salary range as salary_range, growth potential as growth, skills_needed and resources.
+        """
 
-genai.configure(api_key=api_key)
+def build_summary_prompt(user_data, fmt=None):
+    """Progressive mode prompt asking only for what the results page shows"""
+    json_mode = (fmt or output_format) == "json"
+    if user_data['goal'] == "Higher Studies":
+        if json_mode:
+            ask = "For each give a title, a brief overview and up to 3 top institutions."
+        else:
+            ask = """For each recommendation, provide this exact format:
+        --- RECOMMENDATION 1
+        TITLE: [Recommendation title]
+        OVERVIEW: [Brief overview]
+        INSTITUTIONS: [comma, separated, list of up to 3 top institutions]"""
+        return f"""
+        Act as a career counselor specializing in higher education. Provide 3 recommendations for a student based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+
+        Keep each one short: the details follow later.
+        {ask}
+        """
+    if json_mode:
+        ask = "For each give the job title/role as title, a brief overview, the salary range as salary_range and growth potential as growth."
+    else:
+        ask = """For each recommendation, provide this exact format:
+        --- RECOMMENDATION 1
+        TITLE: [Job title/role]
+        OVERVIEW: [Brief overview]
+        SALARY: [Salary range]
+        GROWTH: [Growth potential]"""
+    return f"""
+        Act as a career counselor specializing in job placements. Provide 3 career recommendations for a job seeker based on:
+        - Age: {user_data['age']}
+        - Qualifications: {user_data['qualifications']}
+        - Skills: {user_data['skills']}
+        - Interests: {user_data['interests']}
+        - Location: {user_data['location']}
+
+        Keep each one short: the details follow later.
+        {ask}
+        """
 
-# Create a model instance
-model = genai.GenerativeModel("models/gemini-flash-latest")
+def build_detail_prompt(user_data, rec, fmt=None):
+    """Progressive mode prompt for the full version of one recommendation from the summary call"""
+    # The full prompt with the count and the recommendation pinned down
+    prompt = build_prompt(user_data, fmt).replace("Provide 3 detailed", "Provide 1 detailed", 1)
+    return prompt + f"""
+        The recommendation must be: {rec['title']}
+        Overview: {rec['overview']}
+        """
 
-def generate_recommendations(user_data):
+def generate_recommendations(user_data, summary=False):
     """Generate career recommendations based on user data using Gemini AI"""
     try:
-        if user_data['goal'] == "Higher Studies":
-            prompt = f"""
-            Act as a career counselor specializing in higher education. Provide 3 detailed recommendations for {user_data['name']} based on:
-            - Age: {user_data['age']}
-            - Qualifications: {user_data['qualifications']}
-            - Skills: {user_data['skills']}
-            - Interests: {user_data['interests']}
-            - Location: {user_data['location']}
-            
-            For each recommendation, provide this exact format:
-            --- RECOMMENDATION 1
-            TITLE: [Recommendation title]
-            OVERVIEW: [Brief overview]
-            DETAILS: [Detailed description]
-            PROS: [comma, separated, list]
-            CONS: [comma, separated, list]
-            INSTITUTIONS: [comma, separated, list of top institutions]
-            RESOURCES: [comma, separated, list of resources]
-            """
-        else:
-            prompt = f"""
-            Act as a career counselor specializing in job placements. Provide 3 detailed career recommendations for {user_data['name']} based on:
-            - Age: {user_data['age']}
-            - Qualifications: {user_data['qualifications']}
-            - Skills: {user_data['skills']}
-            - Interests: {user_data['interests']}
-            - Location: {user_data['location']}
-            
-            For each recommendation, provide this exact format:
-            --- RECOMMENDATION 1
-            TITLE: [Job title/role]
-            OVERVIEW: [Brief overview]
-            DETAILS: [Detailed description]
-            PROS: [comma, separated, list]
-            CONS: [comma, separated, list]
-            COMPANIES: [comma, separated, list of top companies]
-            SALARY: [Salary range]
-            GROWTH: [Growth potential]
-            SKILLS NEEDED: [comma, separated, list]
-            RESOURCES: [comma, separated, list of resources]
-            """
-        
-        response = model.generate_content(prompt)
+        with timed('prompt_build'):
+            prompt = build_summary_prompt(user_data) if summary else build_prompt(user_data)
+        config = generation_config(user_data['goal'] == "Higher Studies", summary) if output_format == "json" else None
+        # Summary and full prompts for one profile are different calls, so they mustn't be coalesced
+        key = make_cache_key(user_data) + (':summary' if summary else '')
+        with timed('model_call'):
+            response = model_client.generate(key, prompt, config)
         return response.text
     
     except Exception as e:
@@ -75,74 +300,218 @@ def generate_recommendations(user_data):
         traceback.print_exc()
         return None
 
-def parse_recommendations(text_response, is_higher_study):
-    """Parse the text response into structured recommendation data"""
-    recommendations = []
-    # Split by any variation of RECOMMENDATION section header
-    sections = text_response.split('--- RECOMMENDATION')
-    if len(sections) <= 1:
-        # Fallback if the format is slightly different
-        sections = text_response.split('RECOMMENDATION')
-    
-    sections = sections[1:] # Skip preamble
-    
-    for section in sections:
-        rec = {}
-        # Simple extraction using line containment
-        lines = [l.strip() for l in section.split('\n') if l.strip()]
-        
-        for line in lines:
-            clean_line = line.replace('**', '').replace('*', '').strip()
-            if 'TITLE:' in clean_line:
-                rec['title'] = clean_line.split('TITLE:')[1].strip()
-            elif 'OVERVIEW:' in clean_line:
-                rec['overview'] = clean_line.split('OVERVIEW:')[1].strip()
-            elif 'DETAILS:' in clean_line:
-                rec['details'] = clean_line.split('DETAILS:')[1].strip()
-            elif 'PROS:' in clean_line:
-                content = clean_line.split('PROS:')[1].strip('[] ').split(',')
-                rec['pros'] = [x.strip() for x in content if x.strip()]
-            elif 'CONS:' in clean_line:
-                content = clean_line.split('CONS:')[1].strip('[] ').split(',')
-                rec['cons'] = [x.strip() for x in content if x.strip()]
-            elif 'RESOURCES:' in clean_line:
-                content = clean_line.split('RESOURCES:')[1].strip('[] ').split(',')
-                rec['resources'] = [x.strip() for x in content if x.strip()]
-            elif is_higher_study:
-                if 'INSTITUTIONS:' in clean_line:
-                    content = clean_line.split('INSTITUTIONS:')[1].strip('[] ').split(',')
-                    rec['institutions'] = [x.strip() for x in content if x.strip()]
-            else:
-                if 'COMPANIES:' in clean_line:
-                    content = clean_line.split('COMPANIES:')[1].strip('[] ').split(',')
-                    rec['companies'] = [x.strip() for x in content if x.strip()]
-                elif 'SALARY:' in clean_line:
-                    rec['salary_range'] = clean_line.split('SALARY:')[1].strip()
-                elif 'GROWTH:' in clean_line:
-                    rec['growth'] = clean_line.split('GROWTH:')[1].strip()
-                elif 'SKILLS NEEDED:' in clean_line:
-                    content = clean_line.split('SKILLS NEEDED:')[1].strip('[] ').split(',')
-                    rec['skills_needed'] = [x.strip() for x in content if x.strip()]
-        
-        if rec.get('title'):
-            # Fill in defaults for missing fields to prevent UI errors
-            rec.setdefault('overview', 'No overview provided.')
-            rec.setdefault('details', 'No details provided.')
-            rec.setdefault('pros', [])
-            rec.setdefault('cons', [])
-            rec.setdefault('resources', [])
-            if is_higher_study:
-                rec.setdefault('institutions', [])
-            else:
-                rec.setdefault('companies', [])
-                rec.setdefault('salary_range', 'N/A')
-                rec.setdefault('growth', 'N/A')
-                rec.setdefault('skills_needed', [])
-            recommendations.append(rec)
-    
+def parse_response(response_text, is_higher_study):
+    if output_format == "json":
+        return parse_structured_recommendations(response_text, is_higher_study)
+    return parse_recommendations(response_text, is_higher_study)
+
+def get_recommendations(user_data, summary=False):
+    """Return parsed recommendations, serving repeated profiles from the cache.
+
+    With summary=True the recommendations may be summary-only (progressive
+    mode); otherwise any summary-only ones are completed before returning.
+    """
+    if recommendation_cache:
+        with timed('cache_lookup'):
+            recommendations = recommendation_cache.get(user_data)
+        if recommendations is not None:
+            if not summary and expand_recommendations(user_data, recommendations):
+                recommendation_cache.set(user_data, recommendations)
+            return recommendations
+
+    with admission:
+        response_text = generate_recommendations(user_data, summary)
+    if not response_text:
+        raise ValueError("Failed to generate recommendations")
+
+    with timed('parse'):
+        recommendations = parse_response(response_text, user_data['goal'] == "Higher Studies")
+    if summary:
+        for rec in recommendations:
+            rec['summary_only'] = True
+    if recommendation_cache and recommendations:
+        recommendation_cache.set(user_data, recommendations)
     return recommendations
 
-@app.route('/', methods=['GET', 'POST'])
+def expand_recommendations(user_data, recommendations, indices=None):
+    """Generate the details of the summary-only recommendations at indices (default all) in place.
+
+    The calls run concurrently; returns True if any recommendation changed.
+    """
+    if indices is None:
+        indices = range(len(recommendations))
+    pending = [i for i in indices if recommendations[i].get('summary_only')]
+    if not pending:
+        return False
+    is_higher_study = user_data['goal'] == "Higher Studies"
+    config = generation_config(is_higher_study) if output_format == "json" else None
+    key = make_cache_key(user_data)
+    with timed('prompt_build'):
+        calls = [(f"{key}:{recommendations[i]['title']}", build_detail_prompt(user_data, recommendations[i]), config)
+                 for i in pending]
+    with admission:
+        with timed('model_call'):
+            responses = model_client.generate_all(calls)
+    with timed('parse'):
+        for i, response in zip(pending, responses):
+            parsed = parse_response(response.text, is_higher_study)
+            if not parsed:
+                raise ValueError("Failed to generate recommendation details")
+            # Keep the title and overview the results page already showed
+            recommendations[i] = dict(parsed[0], title=recommendations[i]['title'],
+                                      overview=recommendations[i]['overview'])
+    return True
+
+def load_details(result_id, result, indices=None):
+    """Return the stored result with details for the recommendations at indices (default all)"""
+    if not expand_recommendations(result['user_data'], result['recommendations'], indices):
+        return result
+    with details_lock:
+        # Merge into the latest copy so concurrent expansions of other recommendations survive
+        latest = result_store.load(result_id) or result
+        for i, rec in enumerate(result['recommendations']):
+            if not rec.get('summary_only'):
+                latest['recommendations'][i] = rec
+        result_store.update(result_id, latest)
+    if recommendation_cache:
+        recommendation_cache.set(latest['user_data'], latest['recommendations'])
+    return latest
+
+def stream_recommendations(user_data):
+    """Yield parsed recommendations one by one while the model is still responding"""
+    if recommendation_cache:
+        with timed('cache_lookup'):
+            recommendations = recommendation_cache.get(user_data)
+        if recommendations is not None:
+            yield from recommendations
+            return
+
+    with timed('prompt_build'):
+        prompt = build_summary_prompt(user_data) if progressive_enabled else build_prompt(user_data)
+    is_higher_study = user_data['goal'] == "Higher Studies"
+    if output_format == "json":
+        parser = JsonRecommendationParser(is_higher_study)
+        config = {'generation_config': generation_config(is_higher_study, progressive_enabled)}
+    else:
+        parser = RecommendationParser(is_higher_study)
+        config = {}
+    recommendations = []
+    route = current_route()
+    parse_seconds = 0.0
+    first_chunk = True
+    with admission:
+        start = time.perf_counter()
+        for chunk in model_client.stream(prompt, **config):
+            if first_chunk:
+                STAGE_SECONDS.observe(time.perf_counter() - start, route, 'model_first_chunk')
+                first_chunk = False
+            parse_start = time.perf_counter()
+            completed = parser.feed(chunk.text)
+            parse_seconds += time.perf_counter() - parse_start
+            for rec in completed:
+                if progressive_enabled:
+                    rec['summary_only'] = True
+                recommendations.append(rec)
+                yield rec
+    for rec in parser.close():
+        if progressive_enabled:
+            rec['summary_only'] = True
+        recommendations.append(rec)
+        yield rec
+    STAGE_SECONDS.observe(parse_seconds, route, 'parse')
+
+    if recommendation_cache and recommendations:
+        recommendation_cache.set(user_data, recommendations)
+
+def prefetch_reports(result_id, user_data, recommendations):
+    """Queue the detailed reports and then the summary report on the low-priority PDF pool"""
+    job_ids = []
+    try:
+        # Summary-only recommendations (progressive mode) would render a different report once expanded
+        for rec in recommendations:
+            if not rec.get('summary_only'):
+                job_ids.append(pdf_jobs.prefetch(report_renderer.detailed(user_data, rec)))
+        if not any(rec.get('summary_only') for rec in recommendations):
+            job_ids.append(pdf_jobs.prefetch(report_renderer.summary(user_data, recommendations)))
+    except Exception as e:
+        print(f"PDF prefetch error: {str(e)}")
+        traceback.print_exc()
+    prefetch_jobs.set(result_id, job_ids)
+
+def cancel_prefetch_reports(result_id):
+    pdf_jobs.cancel_prefetch(prefetch_jobs.get(result_id) or ())
+    prefetch_jobs.delete(result_id)
+
+def schedule_prefetch(result_id, user_data, recommendations):
+    if prefetch_enabled:
+        prefetch_executor.submit(prefetch_reports, result_id, user_data, recommendations)
+
+def forget_previous_result():
+    """Cancel the queued prefetches of this browser's previous results, which a new submission replaces"""
+    previous = session.pop('result_id', None)
+    if prefetch_enabled and previous:
+        # On the prefetch thread, so it runs after that result's prefetches were queued
+        prefetch_executor.submit(cancel_prefetch_reports, previous)
+
+def send_pdf_job(job_id, download_name):
+    """Send a rendered PDF, or a 202 with polling URLs if the client won't wait or the render is slow"""
+    accepted = jsonify({
+        'job_id': job_id,
+        'status_url': url_for('.pdf_job_status', job_id=job_id),
+        'download_url': url_for('.pdf_job_download', job_id=job_id, name=download_name)
+    }), 202
+    if request.values.get('async'):
+        return accepted
+    try:
+        with timed('pdf_wait'):
+            pdf = pdf_jobs.result(job_id, timeout=pdf_wait_timeout)
+    except FuturesTimeoutError:
+        return accepted
+    if pdf is None:
+        raise RuntimeError(f"PDF job {job_id} failed")
+    return send_file(io.BytesIO(pdf), download_name=download_name, as_attachment=True, mimetype='application/pdf')
+
+def export_result(result_id, reports):
+    """Render the requested reports of one stored result and return them as (name, PDF bytes) pairs"""
+    result = result_store.load(result_id)
+    if result is None or not result['recommendations']:
+        raise ValueError("Unknown or expired result")
+    result = load_details(result_id, result)
+    user_data = result['user_data']
+    recommendations = result['recommendations']
+    folder = f"{secure_filename(user_data['name'] or '') or 'Profile'}_{result_id[:8]}"
+
+    # Submit everything first so the PDF pool renders this result's reports side by side
+    jobs = []
+    if reports in ('summary', 'all'):
+        jobs.append((f"{folder}/Career_Report.pdf",
+                     pdf_jobs.submit(report_renderer.summary(user_data, recommendations))))
+    if reports in ('detailed', 'all'):
+        for i, rec in enumerate(recommendations, 1):
+            name = secure_filename(rec['title']) or 'Recommendation'
+            jobs.append((f"{folder}/Detailed_Analysis_{i}_{name}.pdf",
+                         pdf_jobs.submit(report_renderer.detailed(user_data, rec))))
+    files = []
+    for name, job_id in jobs:
+        pdf = pdf_jobs.result(job_id, timeout=export_pdf_timeout)
+        if pdf is None:
+            raise RuntimeError(f"PDF job {job_id} failed")
+        files.append((name, pdf))
+    return files
+
+def export_entries(result_ids, reports):
+    """Yield ZIP entries as result sets finish rendering, then an errors.txt listing any that failed"""
+    errors = []
+    for result_id, files, error in render_exports(result_ids, lambda result_id: export_result(result_id, reports),
+                                                  export_concurrency):
+        if error is not None:
+            print(f"Export of result {result_id} failed: {error}")
+            errors.append(f"{result_id}: {error}")
+        yield from files
+    if errors:
+        yield 'errors.txt', '\n'.join(errors) + '\n'
+
+@bp.route('/', methods=['GET', 'POST'])
 def index():
     if request.method == 'POST':
         user_data = {
@@ -154,10 +523,16 @@ def index():
             'location': request.form.get('location'),
             'goal': request.form.get('goal')
         }
-        return render_template('loading.html', user_data=user_data)
+        forget_previous_result()
+        # The stream looks the profile up by ID, keeping it out of the GET query string and access logs
+        stream_id = result_store.save(user_data, []) if stream_enabled else None
+        if stream_id:
+            session['result_id'] = stream_id
+        return render_template('loading.html', user_data=user_data, stream_enabled=stream_enabled,
+                               stream_id=stream_id)
     return render_template('index.html')
 
-@app.route('/generate', methods=['POST'])
+@bp.route('/generate', methods=['POST'])
 def generate():
     try:
         user_data = {
@@ -170,70 +545,154 @@ def generate():
             'goal': request.form.get('goal')
         }
         
-        # Generate recommendations
-        response_text = generate_recommendations(user_data)
-        if not response_text:
-            raise ValueError("Failed to generate recommendations")
-        
-        # Parse recommendations
-        is_higher_study = user_data['goal'] == "Higher Studies"
-        recommendations = parse_recommendations(response_text, is_higher_study)
+        # Generate (or reuse cached) recommendations
+        recommendations = get_recommendations(user_data, summary=progressive_enabled)
+        with timed('result_save'):
+            result_id = result_store.save(user_data, recommendations)
+        session['result_id'] = result_id
+        schedule_prefetch(result_id, user_data, recommendations)
         
         return render_template('results.html', 
                             user_data=user_data,
-                            recommendations=recommendations)
+                            recommendations=recommendations,
+                            result_id=result_id)
     
+    except ServiceBusy:
+        busy_page = render_template('error.html',
+                            error="We're handling a lot of requests right now. Please try again in a few seconds.")
+        return busy_page, 503, {'Retry-After': str(busy_retry_after)}
     except Exception as e:
         print(f"Route /generate error: {str(e)}")
         traceback.print_exc()
         return render_template('error.html',
                             error="Couldn't generate recommendations. Please try again.")
 
-@app.route('/recommendation_detail', methods=['POST'])
+@bp.route('/generate_stream/<result_id>')
+def generate_stream(result_id):
+    with timed('result_load'):
+        result = result_store.load(result_id)
+
+    def events():
+        try:
+            if result is None:
+                raise ValueError("Unknown or expired profile")
+            if result['recommendations']:
+                # A reconnect after the results were stored
+                yield f"event: done\ndata: {json.dumps({'result_id': result_id})}\n\n"
+                return
+            user_data = result['user_data']
+            recommendations = []
+            for rec in stream_recommendations(user_data):
+                recommendations.append(rec)
+                yield f"event: recommendation\ndata: {json.dumps(rec)}\n\n"
+            if not recommendations:
+                raise ValueError("Failed to generate recommendations")
+            with timed('result_save'):
+                result_store.update(result_id, {'user_data': user_data, 'recommendations': recommendations})
+            schedule_prefetch(result_id, user_data, recommendations)
+            yield f"event: done\ndata: {json.dumps({'result_id': result_id})}\n\n"
+        except Exception as e:
+            print(f"Route /generate_stream error: {str(e)}")
+            traceback.print_exc()
+            yield f"event: failed\ndata: {json.dumps({'error': 'generation failed'})}\n\n"
+
+    return Response(stream_with_context(events()),
+                    mimetype='text/event-stream',
+                    headers={'Cache-Control': 'no-cache', 'X-Accel-Buffering': 'no'})
+
+@bp.route('/results/<result_id>')
+def results(result_id):
+    with timed('result_load'):
+        result = result_store.load(result_id)
+    # No recommendations: a profile saved for /generate_stream that hasn't finished
+    if result is None or not result['recommendations']:
+        return render_template('error.html',
+                            error="These results have expired. Please start a new analysis."), 404
+    return render_template('results.html',
+                        user_data=result['user_data'],
+                        recommendations=result['recommendations'],
+                        result_id=result_id)
+
+@bp.route('/batch', methods=['POST'])
+def batch_generate():
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'Upload a CSV or JSONL file of profiles as "file"'}), 400
+    fmt = request.form.get('format') or detect_format(upload.filename)
+    try:
+        concurrency = max(1, min(int(request.form.get('concurrency', batch_max_concurrency)), batch_max_concurrency))
+    except ValueError:
+        return jsonify({'error': '"concurrency" must be an integer'}), 400
+    source = open_upload(upload)
+
+    def lines():
+        try:
+            for result in run_batch(read_profiles(source, fmt), get_recommendations, concurrency):
+                if result['status'] == 'ok':
+                    # Stored so the cohort's reports can be fetched from /export_reports
+                    result['result_id'] = result_store.save(result['user_data'], result['recommendations'])
+                yield json.dumps(result) + '\n'
+        finally:
+            source.close()
+
+    return Response(stream_with_context(lines()), mimetype='application/x-ndjson')
+
+@bp.route('/export_reports', methods=['POST'])
+def export_reports():
+    """Stream a ZIP of the PDF reports of several stored results, adding each one as it is rendered"""
+    if request.is_json:
+        body = request.get_json(silent=True) or {}
+        result_ids, reports = body.get('result_ids') or [], body.get('reports', 'all')
+    else:
+        result_ids = request.form.getlist('result_id') or request.form.get('result_ids', '').split(',')
+        reports = request.form.get('reports', 'all')
+    # Keep the order, drop blanks and repeats
+    result_ids = list(dict.fromkeys(str(result_id).strip() for result_id in result_ids if str(result_id).strip()))
+    if reports not in ('summary', 'detailed', 'all'):
+        return jsonify({'error': 'reports must be "summary", "detailed" or "all"'}), 400
+    if not result_ids:
+        return jsonify({'error': 'Pass the result sets to export as "result_ids"'}), 400
+    if len(result_ids) > export_max_results:
+        return jsonify({'error': f'At most {export_max_results} result sets can be exported at once'}), 400
+
+    return Response(stream_with_context(iter_zip(export_entries(result_ids, reports))),
+                    mimetype='application/zip',
+                    headers={'Content-Disposition': 'attachment; filename=Career_Reports.zip'})
+
+@bp.route('/cache_stats')
+def cache_stats():
+    if not recommendation_cache:
+        return jsonify({'enabled': False})
+    return jsonify(dict(enabled=True, **recommendation_cache.stats()))
+
+@bp.route('/model_stats')
+def model_stats():
+    pool = model.load() if model.loaded else None
+    return jsonify(dict(model_client.stats(), admission=admission.stats(),
+                        pool=pool.stats() if isinstance(pool, ModelPool) else None))
+
+@bp.route('/metrics')
+def metrics():
+    return Response(REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+@bp.route('/recommendation_detail', methods=['POST'])
 def recommendation_detail():
     try:
+        with timed('result_load'):
+            result = result_store.load(request.form.get('result_id'))
+        if result is None:
+            raise ValueError("Unknown or expired result")
+        
         index = int(request.form.get('index', 0))
-        if index < 0 or index > 2:
+        if index < 0 or index >= len(result['recommendations']):
             raise ValueError("Invalid recommendation index")
-        
-        recommendations = []
-        for i in range(3):
-            rec = {
-                'title': request.form.get(f'rec_{i}_title', ''),
-                'overview': request.form.get(f'rec_{i}_overview', ''),
-                'details': request.form.get(f'rec_{i}_details', ''),
-                'pros': request.form.get(f'rec_{i}_pros', '').split('|'),
-                'cons': request.form.get(f'rec_{i}_cons', '').split('|'),
-                'resources': request.form.get(f'rec_{i}_resources', '').split('|')
-            }
-            
-            if request.form.get('goal') == "Higher Studies":
-                rec['institutions'] = request.form.get(f'rec_{i}_institutions', '').split('|')
-            else:
-                rec['companies'] = request.form.get(f'rec_{i}_companies', '').split('|')
-                rec['salary_range'] = request.form.get(f'rec_{i}_salary', 'Not specified')
-                rec['growth'] = request.form.get(f'rec_{i}_growth', 'Not specified')
-                rec['skills_needed'] = request.form.get(f'rec_{i}_skills_needed', '').split('|')
-            
-            recommendations.append(rec)
-        
-        if not recommendations or not recommendations[0]['title']:
-            raise ValueError("No recommendation data found")
-        
-        user_data = {
-            'name': request.form.get('name', ''),
-            'age': request.form.get('age', ''),
-            'qualifications': request.form.get('qualifications', ''),
-            'skills': request.form.get('skills', ''),
-            'interests': request.form.get('interests', ''),
-            'location': request.form.get('location', ''),
-            'goal': request.form.get('goal', '')
-        }
+        result = load_details(request.form.get('result_id'), result, [index])
         
         return render_template('detail.html',
-                       recommendations=recommendations,
-                       user_data=user_data,
-                       index=index)
+                       recommendations=result['recommendations'],
+                       user_data=result['user_data'],
+                       index=index,
+                       result_id=request.form.get('result_id'))
 
     except Exception as e:
         print(f"Route /recommendation_detail error: {str(e)}")
@@ -241,246 +700,116 @@ def recommendation_detail():
         return render_template('error.html',
                             error="Couldn't load recommendation details. Please try again from the beginning.")
 
-@app.route('/download_report', methods=['POST'])
+@bp.route('/download_report', methods=['POST'])
 def download_report():
     try:
-        user_data = {
-            'name': request.form.get('name'),
-            'age': request.form.get('age'),
-            'qualifications': request.form.get('qualifications'),
-            'skills': request.form.get('skills'),
-            'interests': request.form.get('interests'),
-            'location': request.form.get('location'),
-            'goal': request.form.get('goal')
-        }
-        
-        recommendations = []
-        for i in range(3):
-            title = request.form.get(f'rec_{i}_title')
-            if not title:
-                continue
-            
-            rec = {
-                'title': title,
-                'overview': request.form.get(f'rec_{i}_overview'),
-                'details': request.form.get(f'rec_{i}_details')
-            }
-
-            if user_data['goal'] == "Higher Studies":
-                inst = request.form.get(f'rec_{i}_institutions', '')
-                rec['institutions'] = inst.split('|') if inst else []
-            else:
-                comp = request.form.get(f'rec_{i}_companies', '')
-                rec['companies'] = comp.split('|') if comp else []
-                rec['salary_range'] = request.form.get(f'rec_{i}_salary', 'N/A')
-                rec['growth'] = request.form.get(f'rec_{i}_growth', 'N/A')
-
-            recommendations.append(rec)
+        with timed('result_load'):
+            result = result_store.load(request.form.get('result_id'))
+        if result is None:
+            raise ValueError("Unknown or expired result")
+        result = load_details(request.form.get('result_id'), result)
+        user_data = result['user_data']
+        recommendations = result['recommendations']
         
-        # Enhanced HTML content for PDF
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                @page {{ size: A4; margin: 1cm; }}
-                body {{ font-family: 'Helvetica', 'Arial', sans-serif; color: #333; line-height: 1.5; }}
-                .header {{ background-color: #4361ee; color: white; padding: 30px; border-radius: 10px; margin-bottom: 30px; }}
-                .header h1 {{ margin: 0; font-size: 28pt; }}
-                .header p {{ margin: 5px 0 0; opacity: 0.9; }}
-                .profile-section {{ background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 30px; border-left: 5px solid #4361ee; }}
-                .profile-item {{ margin-bottom: 8px; font-size: 11pt; }}
-                .profile-item strong {{ color: #4361ee; width: 150px; display: inline-block; }}
-                .rec-card {{ border: 1px solid #e0e0e0; border-radius: 8px; margin-bottom: 25px; padding: 20px; }}
-                .rec-title {{ color: #4361ee; font-size: 18pt; margin-top: 0; border-bottom: 1px solid #eee; padding-bottom: 10px; }}
-                .section-label {{ font-weight: bold; color: #3f37c9; margin-top: 15px; display: block; text-transform: uppercase; font-size: 9pt; letter-spacing: 1px; }}
-                .content-text {{ margin: 5px 0 15px; font-size: 11pt; text-align: justify; }}
-                .tag-container {{ margin: 10px 0; }}
-                .tag {{ background-color: #e9ecef; padding: 3px 10px; border-radius: 15px; font-size: 9pt; display: inline-block; margin-right: 5px; margin-bottom: 5px; color: #495057; }}
-                .footer {{ text-align: center; color: #999; font-size: 9pt; margin-top: 50px; border-top: 1px solid #eee; padding-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>Career Compass Report</h1>
-                <p>Personalized Recommendations for {user_data['name']}</p>
-            </div>
-
-            <div class="profile-section">
-                <div class="profile-item"><strong>Age:</strong> {user_data['age']}</div>
-                <div class="profile-item"><strong>Qualifications:</strong> {user_data['qualifications']}</div>
-                <div class="profile-item"><strong>Skills:</strong> {user_data['skills']}</div>
-                <div class="profile-item"><strong>Interests:</strong> {user_data['interests']}</div>
-                <div class="profile-item"><strong>Desired Location:</strong> {user_data['location']}</div>
-                <div class="profile-item"><strong>Primary Goal:</strong> {user_data['goal']}</div>
-            </div>
-
-            <h2 style="color: #4361ee; margin-bottom: 20px;">Top Career Recommendations</h2>
-        """
-
-        for rec in recommendations:
-            html_content += f"""
-            <div class="rec-card">
-                <h3 class="rec-title">{rec['title']}</h3>
-                <span class="section-label">Overview</span>
-                <p class="content-text">{rec['overview']}</p>
-                
-                <span class="section-label">Detailed Path</span>
-                <p class="content-text">{rec['details']}</p>
-            """
-            
-            if user_data['goal'] == "Higher Studies":
-                html_content += '<span class="section-label">Top Institutions</span><div class="tag-container">'
-                for inst in rec['institutions']:
-                    html_content += f'<span class="tag">{inst}</span>'
-                html_content += '</div>'
-            else:
-                html_content += '<span class="section-label">Target Companies</span><div class="tag-container">'
-                for comp in rec['companies']:
-                    html_content += f'<span class="tag">{comp}</span>'
-                html_content += f'</div><p class="profile-item"><strong>Expected Salary:</strong> {rec["salary_range"]}</p>'
-                html_content += f'<p class="profile-item"><strong>Growth Potential:</strong> {rec["growth"]}</p>'
-                
-            html_content += "</div>"
-
-        html_content += """
-            <div class="footer">
-                Generated by Career Compass AI &bull; Empowering Your Professional Journey
-            </div>
-        </body></html>
-        """
-
-        pdf_file = io.BytesIO()
-        pisa.CreatePDF(html_content, dest=pdf_file)
-        pdf_file.seek(0)
-        return send_file(pdf_file, download_name=f"Career_Report_{user_data['name'].replace(' ', '_')}.pdf", as_attachment=True, mimetype='application/pdf')
+        with timed('report_html'):
+            html_content = report_renderer.summary(user_data, recommendations)
+        with timed('pdf_submit'):
+            job_id = pdf_jobs.submit(html_content)
+        return send_pdf_job(job_id, f"Career_Report_{user_data['name'].replace(' ', '_')}.pdf")
     except Exception as e:
         print("Download error:", e)
         return "An error occurred during PDF generation", 500
 
-@app.route('/download_detailed_report', methods=['POST'])
+@bp.route('/download_detailed_report', methods=['POST'])
 def download_detailed_report():
     try:
-        user_data = {
-            'name': request.form.get('name'),
-            'age': request.form.get('age'),
-            'qualifications': request.form.get('qualifications'),
-            'skills': request.form.get('skills'),
-            'interests': request.form.get('interests'),
-            'location': request.form.get('location'),
-            'goal': request.form.get('goal')
-        }
-
-        rec = {
-            'title': request.form.get('rec_0_title'),
-            'overview': request.form.get('rec_0_overview'),
-            'details': request.form.get('rec_0_details'),
-            'pros': request.form.get('rec_0_pros', '').split('|'),
-            'cons': request.form.get('rec_0_cons', '').split('|'),
-            'resources': request.form.get('rec_0_resources', '').split('|')
-        }
-
-        if user_data['goal'] == "Higher Studies":
-            inst = request.form.get('rec_0_institutions', '')
-            rec['institutions'] = inst.split('|') if inst else []
-        else:
-            rec['companies'] = request.form.get('rec_0_companies', '').split('|')
-            rec['salary_range'] = request.form.get('rec_0_salary', 'N/A')
-            rec['growth'] = request.form.get('rec_0_growth', 'N/A')
-            rec['skills_needed'] = request.form.get('rec_0_skills', '').split('|')
-
-        html_content = f"""
-        <html>
-        <head>
-            <style>
-                @page {{ size: A4; margin: 1.5cm; }}
-                body {{ font-family: 'Helvetica', 'Arial', sans-serif; color: #333; line-height: 1.6; font-size: 11pt; }}
-                .header {{ border-bottom: 2px solid #4361ee; padding-bottom: 10px; margin-bottom: 30px; }}
-                .header h1 {{ color: #4361ee; margin: 0; font-size: 24pt; }}
-                .header p {{ color: #666; margin: 5px 0 0; }}
-                .rec-title-box {{ background-color: #4361ee; color: white; padding: 20px; border-radius: 8px; margin-bottom: 25px; }}
-                .rec-title-box h2 {{ margin: 0; font-size: 20pt; }}
-                .section {{ margin-bottom: 25px; }}
-                .section-title {{ color: #3f37c9; font-size: 14pt; font-weight: bold; border-left: 4px solid #4361ee; padding-left: 10px; margin-bottom: 10px; }}
-                .box {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px; }}
-                .pros-box {{ border-left: 4px solid #4cc9f0; }}
-                .cons-box {{ border-left: 4px solid #f72585; }}
-                ul {{ margin: 5px 0; padding-left: 20px; }}
-                li {{ margin-bottom: 5px; }}
-                .footer {{ text-align: center; color: #999; font-size: 9pt; margin-top: 40px; border-top: 1px solid #eee; padding-top: 20px; }}
-            </style>
-        </head>
-        <body>
-            <div class="header">
-                <h1>Detailed Career Analysis</h1>
-                <p>Prepared for {user_data['name']} &bull; {user_data['goal']}</p>
-            </div>
-
-            <div class="rec-title-box">
-                <h2>{rec['title']}</h2>
-            </div>
-
-            <div class="section">
-                <div class="section-title">Overview</div>
-                <p>{rec['overview']}</p>
-            </div>
-
-            <div class="section">
-                <div class="section-title">In-Depth Analysis</div>
-                <p>{rec['details']}</p>
-            </div>
-
-            <div class="section">
-                <div class="section-title">The Balanced View</div>
-                <div class="box pros-box">
-                    <strong>Advantages:</strong>
-                    <ul>{''.join([f'<li>{p}</li>' for p in rec['pros'] if p.strip()])}</ul>
-                </div>
-                <div class="box cons-box">
-                    <strong>Challenges:</strong>
-                    <ul>{''.join([f'<li>{c}</li>' for c in rec['cons'] if c.strip()])}</ul>
-                </div>
-            </div>
-        """
+        with timed('result_load'):
+            result = result_store.load(request.form.get('result_id'))
+        if result is None:
+            raise ValueError("Unknown or expired result")
+        try:
+            index = int(request.form.get('index', 0))
+        except ValueError:
+            index = -1
+        if index < 0 or index >= len(result['recommendations']):
+            return "Invalid recommendation index", 400
+        result = load_details(request.form.get('result_id'), result, [index])
+        user_data = result['user_data']
+        rec = result['recommendations'][index]
+
+        with timed('report_html'):
+            html_content = report_renderer.detailed(user_data, rec)
+        with timed('pdf_submit'):
+            job_id = pdf_jobs.submit(html_content)
+        return send_pdf_job(job_id, f"Detailed_Analysis_{rec['title'].replace(' ', '_')}.pdf")
+    except Exception as e:
+        print("Download error:", e)
+        return "An error occurred during PDF generation", 500
 
-        if user_data['goal'] == "Higher Studies":
-            html_content += f"""
-            <div class="section">
-                <div class="section-title">Recommended Institutions</div>
-                <ul>{''.join([f'<li>{i}</li>' for i in rec['institutions'] if i.strip()])}</ul>
-            </div>
-            """
-        else:
-            html_content += f"""
-            <div class="section">
-                <div class="section-title">Industry Insights</div>
-                <p><strong>Target Companies:</strong> {', '.join(rec['companies'])}</p>
-                <p><strong>Required Skills:</strong> {', '.join(rec.get('skills_needed', []))}</p>
-                <p><strong>Market Outlook:</strong> {rec['growth']} ({rec['salary_range']})</p>
-            </div>
-            """
-
-        html_content += f"""
-            <div class="section">
-                <div class="section-title">Learning Resources</div>
-                <ul>{''.join([f'<li>{r}</li>' for r in rec['resources'] if r.strip()])}</ul>
-            </div>
-
-            <div class="footer">
-                Generated by Career Compass AI &bull; {user_data['name']}'s Professional Roadmap
-            </div>
-        </body></html>
-        """
+@bp.route('/pdf_jobs/<job_id>')
+def pdf_job_status(job_id):
+    status = pdf_jobs.status(job_id)
+    if status is None:
+        return jsonify({'error': 'Unknown PDF job'}), 404
+    return jsonify({'job_id': job_id, 'status': status})
 
-        pdf_file = io.BytesIO()
-        pisa.CreatePDF(html_content, dest=pdf_file)
-        pdf_file.seek(0)
-        return send_file(pdf_file, download_name=f"Detailed_Analysis_{rec['title'].replace(' ', '_')}.pdf", as_attachment=True, mimetype='application/pdf')
+@bp.route('/pdf_jobs/<job_id>/download')
+def pdf_job_download(job_id):
+    download_name = secure_filename(request.args.get('name', '')) or 'Career_Report.pdf'
+    try:
+        wait = float(request.args.get('wait', 0))
+    except ValueError:
+        wait = -1.0
+    # Also rejects NaN, which would never reach the deadline
+    if not wait >= 0:
+        return jsonify({'error': '"wait" must be a non-negative number of seconds'}), 400
+    wait = min(wait, pdf_wait_timeout)
+    try:
+        pdf = pdf_jobs.result(job_id, timeout=wait)
+    except FuturesTimeoutError:
+        return jsonify({'job_id': job_id, 'status': 'pending'}), 202
     except Exception as e:
         print("Download error:", e)
-        return "An error occurred during PDF generation", 500
+        pdf = None
+    if pdf is None:
+        return jsonify({'error': 'Unknown or failed PDF job'}), 404
+    return send_file(io.BytesIO(pdf), download_name=download_name, as_attachment=True, mimetype='application/pdf')
+
+def warm_up(pdf=True):
+    """Load the model and start the PDF workers now instead of on the first request.
+
+    With pdf=False only the model is loaded, which is safe before forking
+    workers; the PDF pool holds processes and threads, so it has to be
+    started in each worker.
+    """
+    start = time.perf_counter()
+    model.load()
+    if pdf:
+        pdf_jobs.warm_up()
+    print(f"Warm-up finished in {time.perf_counter() - start:.2f}s")
+
+def create_app(warm=None):
+    """Build the Flask app; warm defaults to the WARM_UP environment variable"""
+    app = Flask(__name__)
+    app.secret_key = os.getenv("SECRET_KEY", "dev-secret-key")
+    app.register_blueprint(bp)
+    before_render_template.connect(start_template_timer, app)
+    template_rendered.connect(record_template_time, app)
+
+    if warm is None:
+        warm = warm_up_enabled
+    if warm:
+        warm_up()
+    return app
+
+# Not warmed up at import: the spawned PDF workers re-import this module when it
+# runs as a script. __main__ below and gunicorn's post_worker_init hook do it instead.
+app = create_app(warm=False)
 
 if __name__ == '__main__':
-    # Use environment variables for host and port if needed, default to local dev
+    if warm_up_enabled:
+        warm_up()
+    # Flask's development server; use gunicorn (see wsgi.py) in production
     port = int(os.getenv("PORT", 5000))
-    debug = os.getenv("FLASK_DEBUG", "True").lower() == "true"
+    debug = os.getenv("FLASK_DEBUG", "False").lower() == "true"
     app.run(host='0.0.0.0', port=port, debug=debug)
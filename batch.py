@@ -0,0 +1,177 @@
+"""Batch recommendations for a cohort of profiles.
+
+Usage: python batch.py profiles.csv [-o results.jsonl] [--concurrency 4] [--resume]
+
+Profiles are read from a CSV file with a header row or a JSONL file, using
+the same fields as the web form. Each result is written as one JSON line as
+soon as it finishes; a profile that fails produces an error line and the
+rest of the batch carries on.
+"""
+import io
+import os
+import csv
+import sys
+import json
+import shutil
+import argparse
+import tempfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+PROFILE_FIELDS = ('name', 'age', 'qualifications', 'skills', 'interests', 'location', 'goal')
+
+# utf-8-sig drops the BOM Excel writes to "CSV UTF-8" files; undecodable bytes
+# become U+FFFD, which read_profiles reports per row instead of ending the batch
+INPUT_ENCODING = 'utf-8-sig'
+INPUT_ERRORS = 'replace'
+
+
+def detect_format(filename):
+    """Guess the input format from a file name, defaulting to CSV"""
+    return 'jsonl' if filename and filename.lower().endswith(('.jsonl', '.ndjson', '.json')) else 'csv'
+
+
+def parse_json_profile(line):
+    """Parse one JSON line, returning a ValueError for lines that aren't a JSON object"""
+    try:
+        row = json.loads(line)
+    except ValueError as e:
+        return ValueError(f"Invalid JSON: {e}")
+    if not isinstance(row, dict):
+        return ValueError("Expected a JSON object")
+    return row
+
+
+def read_profiles(stream, fmt='csv'):
+    """Yield user_data dicts from a text stream of CSV rows or JSON lines.
+
+    A malformed line, or one with bytes that aren't UTF-8, yields a
+    ValueError in its place, so it fails on its own instead of ending the batch.
+    """
+    if fmt == 'jsonl':
+        rows = (parse_json_profile(line) for line in stream if line.strip())
+    else:
+        rows = csv.DictReader(stream)
+    for row in rows:
+        if isinstance(row, ValueError):
+            yield row
+            continue
+        user_data = {field: str(row.get(field) or '').strip() for field in PROFILE_FIELDS}
+        if any('\ufffd' in value for value in user_data.values()):
+            yield ValueError("Not valid UTF-8")
+            continue
+        yield user_data
+
+
+def open_upload(file_storage):
+    """Copy an uploaded file to a private temp file and open it as text for read_profiles.
+
+    The request closes its uploads when the view returns, before a streamed
+    response has finished reading them.
+    """
+    spool = tempfile.TemporaryFile()
+    shutil.copyfileobj(file_storage.stream, spool)
+    spool.seek(0)
+    return io.TextIOWrapper(spool, encoding=INPUT_ENCODING, errors=INPUT_ERRORS, newline='')
+
+
+def process_profile(index, user_data, generate):
+    if isinstance(user_data, ValueError):
+        return {'index': index, 'status': 'error', 'user_data': None, 'error': str(user_data)}
+    try:
+        missing = [field for field in PROFILE_FIELDS if not user_data[field]]
+        if missing:
+            raise ValueError(f"Missing fields: {', '.join(missing)}")
+        recommendations = generate(user_data)
+        if not recommendations:
+            raise ValueError("No recommendations generated")
+        return {'index': index, 'status': 'ok', 'user_data': user_data, 'recommendations': recommendations}
+    except Exception as e:
+        return {'index': index, 'status': 'error', 'user_data': user_data, 'error': str(e)}
+
+
+def run_batch(profiles, generate, concurrency=4, skip=()):
+    """Run generate over profiles on a thread pool, yielding each result as it finishes.
+
+    At most 2 * concurrency profiles are read ahead, so large inputs are
+    streamed rather than loaded up front. Indices listed in skip are not
+    processed (used to resume an interrupted run).
+    """
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = set()
+    try:
+        for index, user_data in enumerate(profiles):
+            if index in skip:
+                continue
+            pending.add(executor.submit(process_profile, index, user_data, generate))
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Without waiting: if the client went away, running profiles finish on their own
+        # and whatever is still queued is dropped
+        executor.shutdown(wait=False, cancel_futures=True)
+
+
+def completed_indices(path):
+    """Indices already processed successfully in an existing output file"""
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get('status') == 'ok':
+                done.add(result['index'])
+    return done
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Generate career recommendations for a batch of profiles")
+    parser.add_argument('input', help="CSV or JSONL file of profiles ('-' for stdin)")
+    parser.add_argument('-o', '--output', help="JSONL file to write results to (default: stdout)")
+    parser.add_argument('--format', choices=('csv', 'jsonl'), help="input format (default: from the file name)")
+    parser.add_argument('--concurrency', type=int, default=int(os.getenv("BATCH_CONCURRENCY", 4)))
+    parser.add_argument('--resume', action='store_true', help="skip profiles already completed in --output")
+    args = parser.parse_args(argv)
+
+    # Imported here so that reading --help does not need a configured model
+    from app import get_recommendations
+
+    fmt = args.format or detect_format(args.input)
+    skip = completed_indices(args.output) if args.resume and args.output else set()
+    if args.input == '-':
+        sys.stdin.reconfigure(encoding=INPUT_ENCODING, errors=INPUT_ERRORS, newline='')
+        source = sys.stdin
+    else:
+        source = open(args.input, encoding=INPUT_ENCODING, errors=INPUT_ERRORS, newline='')
+    out = open(args.output, 'a' if args.resume else 'w', encoding='utf-8') if args.output else sys.stdout
+
+    ok = failed = 0
+    try:
+        for result in run_batch(read_profiles(source, fmt), get_recommendations, args.concurrency, skip):
+            out.write(json.dumps(result, ensure_ascii=False) + '\n')
+            out.flush()
+            if result['status'] == 'ok':
+                ok += 1
+            else:
+                failed += 1
+            print(f"[{ok + failed}] profile {result['index']}: {result['status']}", file=sys.stderr)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if out is not sys.stdout:
+            out.close()
+    print(f"Done: {ok} succeeded, {failed} failed, {len(skip)} skipped", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
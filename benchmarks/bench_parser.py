@@ -0,0 +1,153 @@
+"""Compare the incremental recommendation parser with the original split-based one.
+
+Usage: python benchmarks/bench_parser.py [--repeat N]
+
+Every file in benchmarks/corpus is parsed by both implementations; files
+named higher_* are parsed as "Higher Studies" responses. The script reports
+where the outputs differ, throughput, peak traced allocation per parse, and
+how much of a streamed response the incremental parser needs before it can
+emit the first recommendation.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommendation_parser import RecommendationParser, parse_recommendations  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+
+def legacy_parse_recommendations(text_response, is_higher_study):
+    """The original parse_recommendations from app.py, kept for comparison"""
+    recommendations = []
+    sections = text_response.split('--- RECOMMENDATION')
+    if len(sections) <= 1:
+        sections = text_response.split('RECOMMENDATION')
+
+    sections = sections[1:]
+
+    for section in sections:
+        rec = {}
+        lines = [l.strip() for l in section.split('\n') if l.strip()]
+
+        for line in lines:
+            clean_line = line.replace('**', '').replace('*', '').strip()
+            if 'TITLE:' in clean_line:
+                rec['title'] = clean_line.split('TITLE:')[1].strip()
+            elif 'OVERVIEW:' in clean_line:
+                rec['overview'] = clean_line.split('OVERVIEW:')[1].strip()
+            elif 'DETAILS:' in clean_line:
+                rec['details'] = clean_line.split('DETAILS:')[1].strip()
+            elif 'PROS:' in clean_line:
+                content = clean_line.split('PROS:')[1].strip('[] ').split(',')
+                rec['pros'] = [x.strip() for x in content if x.strip()]
+            elif 'CONS:' in clean_line:
+                content = clean_line.split('CONS:')[1].strip('[] ').split(',')
+                rec['cons'] = [x.strip() for x in content if x.strip()]
+            elif 'RESOURCES:' in clean_line:
+                content = clean_line.split('RESOURCES:')[1].strip('[] ').split(',')
+                rec['resources'] = [x.strip() for x in content if x.strip()]
+            elif is_higher_study:
+                if 'INSTITUTIONS:' in clean_line:
+                    content = clean_line.split('INSTITUTIONS:')[1].strip('[] ').split(',')
+                    rec['institutions'] = [x.strip() for x in content if x.strip()]
+            else:
+                if 'COMPANIES:' in clean_line:
+                    content = clean_line.split('COMPANIES:')[1].strip('[] ').split(',')
+                    rec['companies'] = [x.strip() for x in content if x.strip()]
+                elif 'SALARY:' in clean_line:
+                    rec['salary_range'] = clean_line.split('SALARY:')[1].strip()
+                elif 'GROWTH:' in clean_line:
+                    rec['growth'] = clean_line.split('GROWTH:')[1].strip()
+                elif 'SKILLS NEEDED:' in clean_line:
+                    content = clean_line.split('SKILLS NEEDED:')[1].strip('[] ').split(',')
+                    rec['skills_needed'] = [x.strip() for x in content if x.strip()]
+
+        if rec.get('title'):
+            rec.setdefault('overview', 'No overview provided.')
+            rec.setdefault('details', 'No details provided.')
+            rec.setdefault('pros', [])
+            rec.setdefault('cons', [])
+            rec.setdefault('resources', [])
+            if is_higher_study:
+                rec.setdefault('institutions', [])
+            else:
+                rec.setdefault('companies', [])
+                rec.setdefault('salary_range', 'N/A')
+                rec.setdefault('growth', 'N/A')
+                rec.setdefault('skills_needed', [])
+            recommendations.append(rec)
+
+    return recommendations
+
+
+def load_corpus():
+    corpus = []
+    for name in sorted(os.listdir(CORPUS_DIR)):
+        if name.endswith('.txt'):
+            with open(os.path.join(CORPUS_DIR, name), encoding='utf-8', newline='') as f:
+                corpus.append((name, f.read(), name.startswith('higher_')))
+    return corpus
+
+
+def throughput(parse, corpus, repeat):
+    total_bytes = sum(len(text.encode('utf-8')) for _, text, _ in corpus) * repeat
+    start = time.perf_counter()
+    for _ in range(repeat):
+        for _, text, is_higher_study in corpus:
+            parse(text, is_higher_study)
+    elapsed = time.perf_counter() - start
+    return repeat * len(corpus) / elapsed, total_bytes / elapsed / 1e6
+
+
+def peak_allocation(parse, corpus):
+    peaks = []
+    for _, text, is_higher_study in corpus:
+        tracemalloc.start()
+        parse(text, is_higher_study)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        peaks.append(peak)
+    return sum(peaks) / len(peaks)
+
+
+def first_emit_fraction(text, is_higher_study, chunk_size=64):
+    """Fraction of the response consumed before the first recommendation is emitted"""
+    parser = RecommendationParser(is_higher_study)
+    for offset in range(0, len(text), chunk_size):
+        if parser.feed(text[offset:offset + chunk_size]):
+            return min(offset + chunk_size, len(text)) / len(text)
+    return 1.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000)
+    args = parser.parse_args()
+
+    corpus = load_corpus()
+
+    print("Output comparison")
+    for name, text, is_higher_study in corpus:
+        old = legacy_parse_recommendations(text, is_higher_study)
+        new = parse_recommendations(text, is_higher_study)
+        status = "same" if old == new else "DIFFERS"
+        print(f"  {name:36} legacy={len(old)} new={len(new)} {status}")
+
+    print(f"\nThroughput ({args.repeat} passes over {len(corpus)} responses)")
+    for label, parse in (('legacy', legacy_parse_recommendations), ('incremental', parse_recommendations)):
+        docs, mb = throughput(parse, corpus, args.repeat)
+        peak = peak_allocation(parse, corpus)
+        print(f"  {label:12} {docs:10.0f} responses/s {mb:8.2f} MB/s   peak alloc {peak / 1024:6.1f} KiB/response")
+
+    print("\nStreaming: share of the response received before the first recommendation")
+    for name, text, is_higher_study in corpus:
+        print(f"  {name:36} {first_emit_fraction(text, is_higher_study):6.1%}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,104 @@
+"""Compare one-shot and progressive generation: time to the results page and tokens per session.
+
+Usage: python benchmarks/bench_progressive.py [--sessions N] [--format text|json]
+
+Each session posts the form to /generate and then opens some of the detail
+pages, the way a user would:
+
+  browse     only looks at the results page
+  one        opens one recommendation
+  all        opens every recommendation
+
+For each mode and session type it reports the median time until the results
+page is returned, the median time for the whole session, and the prompt and
+response tokens the session cost. The recommendation cache is disabled so
+every session reaches the model.
+
+By default the offline fake model is used, with a latency of
+FAKE_MODEL_LATENCY plus FAKE_MODEL_TOKEN_LATENCY per response token (0.4s
+and 4ms, roughly Gemini Flash). Set MODEL_BACKEND=gemini and GEMINI_API_KEY
+to measure the real model instead.
+"""
+import os
+import re
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MODEL_BACKEND", "fake")
+os.environ.setdefault("FAKE_MODEL_LATENCY", "0.4")
+os.environ.setdefault("FAKE_MODEL_TOKEN_LATENCY", "0.004")
+os.environ["RECOMMENDATION_CACHE_BACKEND"] = "none"
+os.environ["STREAM_GENERATION"] = "False"
+
+RESULT_ID_RE = re.compile(r'name="result_id" value="([^"]+)"')
+INDEX_RE = re.compile(r'name="index" value="(\d+)"')
+
+PROFILE = {
+    'age': '22',
+    'qualifications': 'B.Tech Computer Science',
+    'skills': 'Python, SQL, Excel',
+    'interests': 'Data analysis, Machine learning',
+    'location': 'Bangalore',
+}
+
+SESSIONS = {'browse': 0, 'one': 1, 'all': None}
+
+
+def token_totals():
+    from metrics import MODEL_TOKENS
+
+    return {kind: MODEL_TOKENS._values.get((kind,), 0) for kind in ('prompt', 'response')}
+
+
+def run_session(client, form, details):
+    tokens_before = token_totals()
+    start = time.perf_counter()
+    with client.post('/generate', data=form) as response:
+        html = response.get_data(as_text=True)
+    to_results = time.perf_counter() - start
+    result_id = RESULT_ID_RE.search(html).group(1)
+    shown = sorted(set(int(index) for index in INDEX_RE.findall(html)))
+    for index in shown[:details]:
+        with client.post('/recommendation_detail', data={'result_id': result_id, 'index': index}) as response:
+            response.get_data()
+    total = time.perf_counter() - start
+    tokens_after = token_totals()
+    return to_results, total, {kind: tokens_after[kind] - tokens_before[kind] for kind in tokens_after}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sessions', type=int, default=5, help="sessions per mode, session type and goal")
+    parser.add_argument('--format', choices=('text', 'json'), default='text', help="MODEL_OUTPUT_FORMAT to use")
+    args = parser.parse_args()
+    os.environ["MODEL_OUTPUT_FORMAT"] = args.format
+
+    import app
+
+    client = app.app.test_client()
+    print(f"{'mode':12} {'session':8} {'to results':>11} {'session':>9} {'prompt tok':>11} {'response tok':>13} {'total tok':>10}")
+    for progressive in (False, True):
+        app.progressive_enabled = progressive
+        for name, details in SESSIONS.items():
+            to_results, totals, prompt_tokens, response_tokens = [], [], [], []
+            for i in range(args.sessions):
+                for goal in ('Higher Studies', 'Job Placement'):
+                    # A new location per session gives a new prompt, so the fake replays varied responses
+                    form = dict(PROFILE, name=f'User {name} {i}', location=f"{PROFILE['location']} {name} {i}", goal=goal)
+                    first, total, tokens = run_session(client, form, details)
+                    to_results.append(first)
+                    totals.append(total)
+                    prompt_tokens.append(tokens['prompt'])
+                    response_tokens.append(tokens['response'])
+            prompt, response = statistics.mean(prompt_tokens), statistics.mean(response_tokens)
+            print(f"{'progressive' if progressive else 'one-shot':12} {name:8} "
+                  f"{statistics.median(to_results) * 1e3:9.0f}ms {statistics.median(totals) * 1e3:7.0f}ms "
+                  f"{prompt:11.0f} {response:13.0f} {prompt + response:10.0f}")
+    app.pdf_jobs.shutdown()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,243 @@
+"""Compare PDF report generation from the compiled Jinja templates with the old f-strings.
+
+Usage: python benchmarks/bench_reports.py [--repeat N] [--pdf-repeat N]
+
+For both the summary report and the detailed single-recommendation report it
+reports the time to build the HTML, the time to build the HTML and render it
+to PDF, and the peak traced memory of each, for the legacy f-string builders
+(copied from the original app.py) and for reports.ReportRenderer.
+"""
+import os
+import sys
+import time
+import argparse
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from pdf_jobs import render_pdf  # noqa: E402
+from recommendation_parser import parse_recommendations  # noqa: E402
+from reports import ReportRenderer  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+
+USER_DATA = {
+    'name': 'Priya Sharma',
+    'age': '22',
+    'qualifications': 'B.Tech Computer Science',
+    'skills': 'Python, SQL, Excel',
+    'interests': 'Data analysis, Machine learning',
+    'location': 'Bangalore',
+}
+
+
+def legacy_summary_html(user_data, recommendations):
+    """HTML built the way the original download_report route did"""
+    html_content = f"""
+    <html>
+    <head>
+        <style>
+            @page {{ size: A4; margin: 1cm; }}
+            body {{ font-family: 'Helvetica', 'Arial', sans-serif; color: #333; line-height: 1.5; }}
+            .header {{ background-color: #4361ee; color: white; padding: 30px; border-radius: 10px; margin-bottom: 30px; }}
+            .header h1 {{ margin: 0; font-size: 28pt; }}
+            .header p {{ margin: 5px 0 0; opacity: 0.9; }}
+            .profile-section {{ background-color: #f8f9fa; padding: 20px; border-radius: 8px; margin-bottom: 30px; border-left: 5px solid #4361ee; }}
+            .profile-item {{ margin-bottom: 8px; font-size: 11pt; }}
+            .profile-item strong {{ color: #4361ee; width: 150px; display: inline-block; }}
+            .rec-card {{ border: 1px solid #e0e0e0; border-radius: 8px; margin-bottom: 25px; padding: 20px; }}
+            .rec-title {{ color: #4361ee; font-size: 18pt; margin-top: 0; border-bottom: 1px solid #eee; padding-bottom: 10px; }}
+            .section-label {{ font-weight: bold; color: #3f37c9; margin-top: 15px; display: block; text-transform: uppercase; font-size: 9pt; letter-spacing: 1px; }}
+            .content-text {{ margin: 5px 0 15px; font-size: 11pt; text-align: justify; }}
+            .tag-container {{ margin: 10px 0; }}
+            .tag {{ background-color: #e9ecef; padding: 3px 10px; border-radius: 15px; font-size: 9pt; display: inline-block; margin-right: 5px; margin-bottom: 5px; color: #495057; }}
+            .footer {{ text-align: center; color: #999; font-size: 9pt; margin-top: 50px; border-top: 1px solid #eee; padding-top: 20px; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Career Compass Report</h1>
+            <p>Personalized Recommendations for {user_data['name']}</p>
+        </div>
+
+        <div class="profile-section">
+            <div class="profile-item"><strong>Age:</strong> {user_data['age']}</div>
+            <div class="profile-item"><strong>Qualifications:</strong> {user_data['qualifications']}</div>
+            <div class="profile-item"><strong>Skills:</strong> {user_data['skills']}</div>
+            <div class="profile-item"><strong>Interests:</strong> {user_data['interests']}</div>
+            <div class="profile-item"><strong>Desired Location:</strong> {user_data['location']}</div>
+            <div class="profile-item"><strong>Primary Goal:</strong> {user_data['goal']}</div>
+        </div>
+
+        <h2 style="color: #4361ee; margin-bottom: 20px;">Top Career Recommendations</h2>
+    """
+
+    for rec in recommendations:
+        html_content += f"""
+        <div class="rec-card">
+            <h3 class="rec-title">{rec['title']}</h3>
+            <span class="section-label">Overview</span>
+            <p class="content-text">{rec['overview']}</p>
+            
+            <span class="section-label">Detailed Path</span>
+            <p class="content-text">{rec['details']}</p>
+        """
+        
+        if user_data['goal'] == "Higher Studies":
+            html_content += '<span class="section-label">Top Institutions</span><div class="tag-container">'
+            for inst in rec['institutions']:
+                html_content += f'<span class="tag">{inst}</span>'
+            html_content += '</div>'
+        else:
+            html_content += '<span class="section-label">Target Companies</span><div class="tag-container">'
+            for comp in rec['companies']:
+                html_content += f'<span class="tag">{comp}</span>'
+            html_content += f'</div><p class="profile-item"><strong>Expected Salary:</strong> {rec["salary_range"]}</p>'
+            html_content += f'<p class="profile-item"><strong>Growth Potential:</strong> {rec["growth"]}</p>'
+            
+        html_content += "</div>"
+
+    html_content += """
+        <div class="footer">
+            Generated by Career Compass AI &bull; Empowering Your Professional Journey
+        </div>
+    </body></html>
+    """
+    return html_content
+
+
+def legacy_detailed_html(user_data, rec):
+    """HTML built the way the original download_detailed_report route did"""
+    html_content = f"""
+    <html>
+    <head>
+        <style>
+            @page {{ size: A4; margin: 1.5cm; }}
+            body {{ font-family: 'Helvetica', 'Arial', sans-serif; color: #333; line-height: 1.6; font-size: 11pt; }}
+            .header {{ border-bottom: 2px solid #4361ee; padding-bottom: 10px; margin-bottom: 30px; }}
+            .header h1 {{ color: #4361ee; margin: 0; font-size: 24pt; }}
+            .header p {{ color: #666; margin: 5px 0 0; }}
+            .rec-title-box {{ background-color: #4361ee; color: white; padding: 20px; border-radius: 8px; margin-bottom: 25px; }}
+            .rec-title-box h2 {{ margin: 0; font-size: 20pt; }}
+            .section {{ margin-bottom: 25px; }}
+            .section-title {{ color: #3f37c9; font-size: 14pt; font-weight: bold; border-left: 4px solid #4361ee; padding-left: 10px; margin-bottom: 10px; }}
+            .box {{ background-color: #f8f9fa; padding: 15px; border-radius: 5px; margin-bottom: 15px; }}
+            .pros-box {{ border-left: 4px solid #4cc9f0; }}
+            .cons-box {{ border-left: 4px solid #f72585; }}
+            ul {{ margin: 5px 0; padding-left: 20px; }}
+            li {{ margin-bottom: 5px; }}
+            .footer {{ text-align: center; color: #999; font-size: 9pt; margin-top: 40px; border-top: 1px solid #eee; padding-top: 20px; }}
+        </style>
+    </head>
+    <body>
+        <div class="header">
+            <h1>Detailed Career Analysis</h1>
+            <p>Prepared for {user_data['name']} &bull; {user_data['goal']}</p>
+        </div>
+
+        <div class="rec-title-box">
+            <h2>{rec['title']}</h2>
+        </div>
+
+        <div class="section">
+            <div class="section-title">Overview</div>
+            <p>{rec['overview']}</p>
+        </div>
+
+        <div class="section">
+            <div class="section-title">In-Depth Analysis</div>
+            <p>{rec['details']}</p>
+        </div>
+
+        <div class="section">
+            <div class="section-title">The Balanced View</div>
+            <div class="box pros-box">
+                <strong>Advantages:</strong>
+                <ul>{''.join([f'<li>{p}</li>' for p in rec['pros'] if p.strip()])}</ul>
+            </div>
+            <div class="box cons-box">
+                <strong>Challenges:</strong>
+                <ul>{''.join([f'<li>{c}</li>' for c in rec['cons'] if c.strip()])}</ul>
+            </div>
+        </div>
+    """
+
+    if user_data['goal'] == "Higher Studies":
+        html_content += f"""
+        <div class="section">
+            <div class="section-title">Recommended Institutions</div>
+            <ul>{''.join([f'<li>{i}</li>' for i in rec['institutions'] if i.strip()])}</ul>
+        </div>
+        """
+    else:
+        html_content += f"""
+        <div class="section">
+            <div class="section-title">Industry Insights</div>
+            <p><strong>Target Companies:</strong> {', '.join(rec['companies'])}</p>
+            <p><strong>Required Skills:</strong> {', '.join(rec.get('skills_needed', []))}</p>
+            <p><strong>Market Outlook:</strong> {rec['growth']} ({rec['salary_range']})</p>
+        </div>
+        """
+
+    html_content += f"""
+        <div class="section">
+            <div class="section-title">Learning Resources</div>
+            <ul>{''.join([f'<li>{r}</li>' for r in rec['resources'] if r.strip()])}</ul>
+        </div>
+
+        <div class="footer">
+            Generated by Career Compass AI &bull; {user_data['name']}'s Professional Roadmap
+        </div>
+    </body></html>
+    """
+    return html_content
+
+
+def load_cases():
+    cases = []
+    for goal, corpus_file in (("Job Placement", 'job_clean.txt'), ("Higher Studies", 'higher_clean.txt')):
+        with open(os.path.join(CORPUS_DIR, corpus_file), encoding='utf-8') as f:
+            recommendations = parse_recommendations(f.read(), goal == "Higher Studies")
+        cases.append((dict(USER_DATA, goal=goal), recommendations))
+    return cases
+
+
+def measure(build, repeat):
+    """Mean seconds per call and peak traced memory of a single call"""
+    build()
+    start = time.perf_counter()
+    for _ in range(repeat):
+        build()
+    elapsed = (time.perf_counter() - start) / repeat
+    tracemalloc.start()
+    build()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help="HTML-only iterations")
+    parser.add_argument('--pdf-repeat', type=int, default=10, help="HTML + PDF iterations")
+    args = parser.parse_args()
+
+    renderer = ReportRenderer()
+    builders = {
+        'summary': (legacy_summary_html, renderer.summary, lambda recs: recs),
+        'detailed': (legacy_detailed_html, renderer.detailed, lambda recs: recs[0]),
+    }
+
+    print(f"{'report':9} {'goal':15} {'builder':9} {'html':>10} {'html peak':>10} {'html+pdf':>10} {'pdf peak':>10}")
+    for user_data, recommendations in load_cases():
+        for report, (legacy, compiled, select) in builders.items():
+            data = select(recommendations)
+            for label, build in (('legacy', legacy), ('compiled', compiled)):
+                html_time, html_peak = measure(lambda: build(user_data, data), args.repeat)
+                pdf_time, pdf_peak = measure(lambda: render_pdf(build(user_data, data)), args.pdf_repeat)
+                print(f"{report:9} {user_data['goal']:15} {label:9} {html_time * 1e6:8.1f}us "
+                      f"{html_peak / 1024:7.1f}KiB {pdf_time * 1e3:8.1f}ms {pdf_peak / 1024:7.0f}KiB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""Measure worker startup: the time to import the app and the resident memory it costs.
+
+Usage: python benchmarks/bench_startup.py [--repeat N]
+
+Each scenario runs in a fresh interpreter, the way a newly started worker
+would, and reports the median wall time and the RSS once it is done:
+
+  baseline   python and the standard library only
+  import     import app (model and PDF engine still unloaded)
+  warm       import app, then warm_up(pdf=False) to load the Gemini model
+  eager      import app, google.generativeai and xhtml2pdf up front, like the
+             original app.py did
+
+The RSS of the spawned PDF workers is not included. A placeholder API key
+is set so the Gemini model can be built; no request is sent.
+"""
+import os
+import sys
+import json
+import argparse
+import statistics
+import subprocess
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    'baseline': "",
+    'import': "import app",
+    'warm': "import app; app.warm_up(pdf=False)",
+    'eager': "import app; import google.generativeai; import xhtml2pdf.pisa; app.warm_up(pdf=False)",
+}
+
+PROBE = """
+import time
+start = time.perf_counter()
+{code}
+elapsed = time.perf_counter() - start
+rss = 0
+with open('/proc/self/status') as f:
+    for line in f:
+        if line.startswith('VmRSS:'):
+            rss = int(line.split()[1])
+import json, sys
+sys.stdout.write('\\n' + json.dumps({{'seconds': elapsed, 'rss_kb': rss}}))
+"""
+
+
+def run_scenario(code):
+    env = dict(os.environ, GEMINI_API_KEY=os.getenv("GEMINI_API_KEY", "placeholder"),
+               MODEL_BACKEND="gemini", WARM_UP="False")
+    output = subprocess.run([sys.executable, '-c', PROBE.format(code=code)], cwd=ROOT, env=env,
+                            capture_output=True, text=True, check=True).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=5, help="fresh interpreters per scenario")
+    args = parser.parse_args()
+
+    print(f"{'scenario':10} {'median time':>12} {'min time':>10} {'RSS':>10}")
+    for name, code in SCENARIOS.items():
+        runs = [run_scenario(code) for _ in range(args.repeat)]
+        times = [run['seconds'] for run in runs]
+        rss = statistics.median(run['rss_kb'] for run in runs)
+        print(f"{name:10} {statistics.median(times) * 1e3:10.0f}ms {min(times) * 1e3:8.0f}ms {rss / 1024:8.1f}MB")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,120 @@
+"""Compare the JSON output mode with the TITLE:/PROS: text format: tokens and parse time.
+
+Usage: python benchmarks/bench_structured_output.py [--repeat N] [--count-tokens]
+
+For every well-formed response in benchmarks/corpus (higher_* and job_*)
+the equivalent JSON-mode response is built from its parsed records, both
+compact and indented, since either may come back. The script reports:
+
+  - prompt and response size for each format, as characters and as an
+    estimated token count (words and punctuation marks counted separately,
+    which charges JSON for every quote and brace)
+  - parse time for parse_recommendations on the text versus
+    parse_json_recommendations on the JSON, and for the streaming parsers
+
+With --count-tokens and GEMINI_API_KEY set, Gemini's count_tokens is used
+for exact token counts instead of the estimate.
+"""
+import os
+import re
+import sys
+import glob
+import json
+import time
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("MODEL_BACKEND", "fake")
+
+from app import build_prompt  # noqa: E402
+from recommendation_parser import RecommendationParser, parse_recommendations  # noqa: E402
+from structured_output import JsonRecommendationParser, parse_json_recommendations  # noqa: E402
+
+CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'corpus')
+TOKEN_PIECE = re.compile(r"\w+|[^\w\s]")
+
+USER_DATA = {
+    'name': 'Priya Sharma',
+    'age': '22',
+    'qualifications': 'B.Tech Computer Science',
+    'skills': 'Python, SQL, Excel',
+    'interests': 'Data analysis, Machine learning',
+    'location': 'Bangalore',
+}
+
+
+def estimate_tokens(text):
+    return len(TOKEN_PIECE.findall(text))
+
+
+def gemini_token_counter():
+    from model_backends import create_gemini_model
+
+    model = create_gemini_model(os.environ["GEMINI_API_KEY"], os.getenv("GEMINI_MODEL", "models/gemini-flash-latest"))
+    return lambda text: model.count_tokens(text).total_tokens
+
+
+def best_time(func, repeat):
+    best = float('inf')
+    for _ in range(5):
+        start = time.perf_counter()
+        for _ in range(repeat):
+            func()
+        best = min(best, (time.perf_counter() - start) / repeat)
+    return best
+
+
+def stream(parser, text, chunk_size=64):
+    out = []
+    for i in range(0, len(text), chunk_size):
+        out += parser.feed(text[i:i + chunk_size])
+    return out + parser.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--repeat', type=int, default=2000, help="parses per timing run")
+    parser.add_argument('--count-tokens', action='store_true', help="use Gemini count_tokens (needs GEMINI_API_KEY)")
+    args = parser.parse_args()
+    count = gemini_token_counter() if args.count_tokens else estimate_tokens
+    unit = "tokens" if args.count_tokens else "est. tokens"
+
+    print(f"Prompt size ({unit})")
+    for goal in ('Higher Studies', 'Job Placement'):
+        user_data = dict(USER_DATA, goal=goal)
+        text_prompt, json_prompt = build_prompt(user_data, 'text'), build_prompt(user_data, 'json')
+        print(f"  {goal:15} text {count(text_prompt):5d}   json {count(json_prompt):5d}   "
+              f"saved {1 - count(json_prompt) / count(text_prompt):6.1%}")
+
+    print(f"\nResponse size ({unit}) and parse time")
+    print(f"{'file':30} {'text':>6} {'json':>6} {'indent':>6} {'text parse':>11} {'json parse':>11} "
+          f"{'speedup':>8} {'text stream':>12} {'json stream':>12}")
+    totals = {'text': 0, 'json': 0, 'indent': 0}
+    for path in sorted(glob.glob(os.path.join(CORPUS_DIR, '*.txt'))):
+        name = os.path.basename(path)
+        if not name.startswith(('higher_', 'job_')):
+            continue
+        is_higher_study = name.startswith('higher_')
+        with open(path, encoding='utf-8') as f:
+            text = f.read()
+        records = parse_recommendations(text, is_higher_study)
+        compact = json.dumps(records, ensure_ascii=False)
+        indented = json.dumps(records, ensure_ascii=False, indent=2)
+        assert parse_json_recommendations(compact, is_higher_study) == records
+
+        sizes = {'text': count(text), 'json': count(compact), 'indent': count(indented)}
+        for key, value in sizes.items():
+            totals[key] += value
+        text_time = best_time(lambda: parse_recommendations(text, is_higher_study), args.repeat)
+        json_time = best_time(lambda: parse_json_recommendations(compact, is_higher_study), args.repeat)
+        text_stream = best_time(lambda: stream(RecommendationParser(is_higher_study), text), args.repeat // 10)
+        json_stream = best_time(lambda: stream(JsonRecommendationParser(is_higher_study), compact), args.repeat // 10)
+        print(f"{name:30} {sizes['text']:6d} {sizes['json']:6d} {sizes['indent']:6d} "
+              f"{text_time * 1e6:9.1f}us {json_time * 1e6:9.1f}us {text_time / json_time:7.1f}x "
+              f"{text_stream * 1e6:10.1f}us {json_stream * 1e6:10.1f}us")
+    print(f"{'total':30} {totals['text']:6d} {totals['json']:6d} {totals['indent']:6d}   "
+          f"(compact JSON {totals['json'] / totals['text'] - 1:+.1%}, indented {totals['indent'] / totals['text'] - 1:+.1%} vs text)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,168 @@
+"""Offline load test for the Flask app, driven against the fake model backend.
+
+Usage: python benchmarks/loadtest.py [--users 8] [--iterations 5] [--latency 0.5]
+                                     [--error-rate 0.0] [--profiles 20] [--url URL]
+
+Each virtual user walks the whole flow: GET /, POST / (loading page),
+POST /generate, POST /recommendation_detail, POST /download_report and
+POST /download_detailed_report. By default the app runs in-process through
+Flask's test client with MODEL_BACKEND=fake, so the numbers are our own
+overhead plus the configured fake latency. Use --url to drive a running
+server instead (start it with MODEL_BACKEND=fake for offline runs).
+Latency percentiles and throughput are reported per route.
+"""
+import os
+import re
+import sys
+import time
+import random
+import argparse
+import threading
+import urllib.parse
+import urllib.request
+import urllib.error
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+RESULT_ID_RE = re.compile(r'name="result_id" value="([^"]+)"')
+INDEX_RE = re.compile(r'name="index" value="(\d+)"')
+
+SKILLS = ['Python', 'SQL', 'Excel', 'Java', 'Figma', 'Marketing', 'Statistics', 'React', 'AWS', 'Writing']
+INTERESTS = ['Data analysis', 'Machine learning', 'Design', 'Finance', 'Healthcare', 'Cloud', 'Teaching']
+
+
+def make_profiles(count, seed=0):
+    rng = random.Random(seed)
+    return [{
+        'name': f'Student {i}',
+        'age': str(rng.randint(18, 30)),
+        'qualifications': rng.choice(['B.Tech Computer Science', 'BSc Mathematics', 'BA Economics', 'BCom']),
+        'skills': ', '.join(rng.sample(SKILLS, 3)),
+        'interests': ', '.join(rng.sample(INTERESTS, 2)),
+        'location': rng.choice(['Bangalore', 'Remote', 'Berlin', 'Toronto']),
+        'goal': rng.choice(['Higher Studies', 'Job Placement']),
+    } for i in range(count)]
+
+
+class TestClientDriver:
+    """Runs requests in-process through Flask's test client"""
+
+    def __init__(self):
+        import app as app_module
+        self.app = app_module.app
+
+    def request(self, method, path, data=None):
+        client = self.app.test_client()
+        with client.open(path, method=method, data=data) as response:
+            return response.status_code, response.get_data()
+
+
+class HttpDriver:
+    """Runs requests against a live server"""
+
+    def __init__(self, base_url):
+        self.base_url = base_url.rstrip('/')
+
+    def request(self, method, path, data=None):
+        body = urllib.parse.urlencode(data).encode() if data is not None else None
+        req = urllib.request.Request(self.base_url + path, data=body, method=method)
+        try:
+            with urllib.request.urlopen(req, timeout=300) as response:
+                return response.status, response.read()
+        except urllib.error.HTTPError as e:
+            return e.code, e.read()
+
+
+class Recorder:
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.errors = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def timed(self, driver, route, method, path, data=None):
+        start = time.perf_counter()
+        status, body = driver.request(method, path, data)
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.latencies[route].append(elapsed)
+            if status >= 400:
+                self.errors[route] += 1
+        return status, body
+
+
+def user_session(driver, recorder, profile):
+    recorder.timed(driver, 'GET /', 'GET', '/')
+    recorder.timed(driver, 'POST /', 'POST', '/', profile)
+    status, body = recorder.timed(driver, 'POST /generate', 'POST', '/generate', profile)
+    page = body.decode('utf-8', 'replace')
+    match = RESULT_ID_RE.search(page)
+    indices = INDEX_RE.findall(page)
+    if status != 200 or not match or not indices:
+        return
+    result_id = match.group(1)
+    index = random.choice(indices)
+    recorder.timed(driver, 'POST /recommendation_detail', 'POST', '/recommendation_detail',
+                   {'result_id': result_id, 'index': index})
+    recorder.timed(driver, 'POST /download_report', 'POST', '/download_report', {'result_id': result_id})
+    recorder.timed(driver, 'POST /download_detailed_report', 'POST', '/download_detailed_report',
+                   {'result_id': result_id, 'index': index})
+
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    position = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[position]
+
+
+def report(recorder, wall_time):
+    print(f"\n{'route':32} {'count':>6} {'errors':>6} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>8}")
+    for route, values in recorder.latencies.items():
+        values = sorted(values)
+        print(f"{route:32} {len(values):6d} {recorder.errors[route]:6d} "
+              f"{percentile(values, 0.50) * 1e3:9.1f} {percentile(values, 0.95) * 1e3:9.1f} "
+              f"{percentile(values, 0.99) * 1e3:9.1f} {len(values) / wall_time:8.1f}")
+    total = sum(len(values) for values in recorder.latencies.values())
+    print(f"\n{total} requests in {wall_time:.1f}s ({total / wall_time:.1f} req/s overall)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--users', type=int, default=8, help="concurrent virtual users")
+    parser.add_argument('--iterations', type=int, default=5, help="sessions per user")
+    parser.add_argument('--profiles', type=int, default=20, help="distinct profiles to draw from")
+    parser.add_argument('--latency', type=float, default=0.5, help="fake model latency in seconds")
+    parser.add_argument('--latency-jitter', type=float, default=0.2)
+    parser.add_argument('--error-rate', type=float, default=0.0, help="fraction of fake model calls that fail")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--url', help="drive a running server instead of the in-process app")
+    args = parser.parse_args()
+
+    if args.url:
+        driver = HttpDriver(args.url)
+    else:
+        os.environ.update({
+            'MODEL_BACKEND': 'fake',
+            'FAKE_MODEL_LATENCY': str(args.latency),
+            'FAKE_MODEL_LATENCY_JITTER': str(args.latency_jitter),
+            'FAKE_MODEL_ERROR_RATE': str(args.error_rate),
+            'FAKE_MODEL_SEED': str(args.seed),
+        })
+        driver = TestClientDriver()
+
+    profiles = make_profiles(args.profiles, args.seed)
+    recorder = Recorder()
+    rng = random.Random(args.seed)
+    sessions = [rng.choice(profiles) for _ in range(args.users * args.iterations)]
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.users) as executor:
+        list(executor.map(lambda profile: user_session(driver, recorder, profile), sessions))
+    report(recorder, time.perf_counter() - start)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,230 @@
+import os
+import copy
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+# Profile fields that influence the generated recommendations. The prompts
+# leave the name out, so answers can be shared between users with the same profile.
+PROFILE_KEY_FIELDS = ('age', 'qualifications', 'skills', 'interests', 'location', 'goal')
+
+
+def normalize_field(value):
+    """Lower-case a form value and collapse runs of whitespace"""
+    return ' '.join(str(value or '').lower().split())
+
+
+def make_cache_key(user_data):
+    """Build a stable cache key from the normalized profile fields and goal"""
+    normalized = {field: normalize_field(user_data.get(field)) for field in PROFILE_KEY_FIELDS}
+    payload = json.dumps(normalized, sort_keys=True, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class MemoryBackend:
+    """In-process LRU store with a per-entry TTL"""
+
+    def __init__(self, max_entries=1024, ttl=3600):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.evictions = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                self.evictions += 1
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key, value):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + self.ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def contains(self, key):
+        """Whether key holds an unexpired value, without counting as a use"""
+        with self._lock:
+            entry = self._entries.get(key)
+            return entry is not None and entry[0] >= time.monotonic()
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SQLiteBackend:
+    """On-disk LRU store with a per-entry TTL; values are stored as JSON, or as-is when binary.
+
+    The database runs in WAL mode, so every worker process on the host can
+    share one file: readers never block the writer, and concurrent writers
+    wait up to busy_timeout seconds for each other. A hit refreshes the
+    entry's LRU position at most once per touch_interval seconds, so
+    repeated reads of a hot key stay reads; contains() never writes.
+    """
+
+    def __init__(self, path, max_entries=10000, ttl=86400, table='cache', binary=False, busy_timeout=5.0,
+                 touch_interval=60.0):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.touch_interval = touch_interval
+        self.table = table
+        self.binary = binary
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, timeout=busy_timeout)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        # Durable at checkpoints rather than every commit, which is plenty for a cache
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            f"CREATE TABLE IF NOT EXISTS {table} ("
+            "key TEXT PRIMARY KEY, value TEXT NOT NULL, "
+            "expires_at REAL NOT NULL, accessed_at REAL NOT NULL)"
+        )
+        self._conn.execute(f"CREATE INDEX IF NOT EXISTS {table}_accessed ON {table} (accessed_at)")
+        self._conn.commit()
+
+    def get(self, key):
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT value, expires_at, accessed_at FROM {self.table} WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            value, expires_at, accessed_at = row
+            if expires_at < now:
+                self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+                self._conn.commit()
+                self.evictions += 1
+                return None
+            if now - accessed_at >= self.touch_interval:
+                self._conn.execute(f"UPDATE {self.table} SET accessed_at = ? WHERE key = ?", (now, key))
+                self._conn.commit()
+        return value if self.binary else json.loads(value)
+
+    def contains(self, key):
+        """Whether key holds an unexpired value; reads neither the value nor counts as a use"""
+        with self._lock:
+            row = self._conn.execute(
+                f"SELECT 1 FROM {self.table} WHERE key = ? AND expires_at >= ?", (key, time.time())
+            ).fetchone()
+        return row is not None
+
+    def set(self, key, value):
+        now = time.time()
+        payload = value if self.binary else json.dumps(value)
+        with self._lock:
+            self._conn.execute(
+                f"INSERT OR REPLACE INTO {self.table} (key, value, expires_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, payload, now + self.ttl, now),
+            )
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+            if count > self.max_entries:
+                cursor = self._conn.execute(
+                    f"DELETE FROM {self.table} WHERE key IN ("
+                    f"SELECT key FROM {self.table} ORDER BY accessed_at LIMIT ?)",
+                    (count - self.max_entries,),
+                )
+                self.evictions += cursor.rowcount
+            self._conn.commit()
+
+    def delete(self, key):
+        with self._lock:
+            self._conn.execute(f"DELETE FROM {self.table} WHERE key = ?", (key,))
+            self._conn.commit()
+
+    def __len__(self):
+        with self._lock:
+            (count,) = self._conn.execute(f"SELECT COUNT(*) FROM {self.table}").fetchone()
+        return count
+
+
+class RecommendationCache:
+    """Cache of parsed recommendations keyed on the normalized user profile.
+
+    With a similarity index, an exact miss falls back to the cached result of
+    a near-duplicate profile (same goal, location and age band, and mostly
+    the same qualifications, skills and interests in any order or wording).
+    """
+
+    def __init__(self, backend, similarity_index=None):
+        self.backend = backend
+        self.similarity_index = similarity_index
+        self.hits = 0
+        self.near_hits = 0
+        self.misses = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the cache from RECOMMENDATION_CACHE_* environment variables"""
+        kind = os.getenv("RECOMMENDATION_CACHE_BACKEND", "memory").lower()
+        ttl = int(os.getenv("RECOMMENDATION_CACHE_TTL", 3600))
+        size = int(os.getenv("RECOMMENDATION_CACHE_SIZE", 1024))
+        if kind == "none":
+            return None
+        from similarity import MinHashIndex
+
+        similarity_index = MinHashIndex.from_env(default_size=size)
+        if kind == "sqlite":
+            path = os.getenv("RECOMMENDATION_CACHE_PATH", "recommendations.sqlite3")
+            return cls(SQLiteBackend(path, max_entries=size, ttl=ttl), similarity_index)
+        if kind != "memory":
+            raise ValueError(f"Unknown RECOMMENDATION_CACHE_BACKEND: {kind}")
+        return cls(MemoryBackend(max_entries=size, ttl=ttl), similarity_index)
+
+    def get(self, user_data):
+        recommendations = self.backend.get(make_cache_key(user_data))
+        if recommendations is None and self.similarity_index is not None:
+            recommendations = self._get_similar(user_data)
+        if recommendations is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return copy.deepcopy(recommendations)
+
+    def _get_similar(self, user_data):
+        key = self.similarity_index.find(user_data)
+        if key is None:
+            return None
+        recommendations = self.backend.get(key)
+        if recommendations is None:
+            # Expired or evicted from the backend since it was indexed
+            self.similarity_index.discard(key)
+            return None
+        self.near_hits += 1
+        return recommendations
+
+    def set(self, user_data, recommendations):
+        key = make_cache_key(user_data)
+        self.backend.set(key, copy.deepcopy(recommendations))
+        if self.similarity_index is not None:
+            self.similarity_index.add(user_data, key)
+
+    def stats(self):
+        return {
+            'backend': type(self.backend).__name__,
+            'hits': self.hits,
+            'near_hits': self.near_hits,
+            'misses': self.misses,
+            'evictions': self.backend.evictions,
+            'size': len(self.backend),
+            'similarity': self.similarity_index.stats() if self.similarity_index is not None else None,
+        }
@@ -0,0 +1,82 @@
+"""Bulk export of stored results as one ZIP of PDF reports, streamed while it is built."""
+import time
+import zipfile
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+
+class ZipStream:
+    """Write-only sink for zipfile that hands out the bytes written so far.
+
+    It has tell() but no seek(), so zipfile writes each entry's sizes in a
+    data descriptor after the entry instead of seeking back to its header.
+    """
+
+    def __init__(self):
+        self._chunks = []
+        self._offset = 0
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self._offset += len(data)
+        return len(data)
+
+    def tell(self):
+        return self._offset
+
+    def flush(self):
+        pass
+
+    def drain(self):
+        """Return and forget everything written since the last drain"""
+        data = b''.join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def iter_zip(entries):
+    """Yield a ZIP archive of (name, bytes) entries piece by piece as the entries arrive.
+
+    Entries are stored uncompressed, as PDFs are compressed already. Only the
+    entry being added is held in memory, plus the central directory, which
+    is written at the end.
+    """
+    sink = ZipStream()
+    with zipfile.ZipFile(sink, 'w', compression=zipfile.ZIP_STORED) as archive:
+        for name, data in entries:
+            info = zipfile.ZipInfo(name, date_time=time.localtime()[:6])
+            info.external_attr = 0o644 << 16
+            archive.writestr(info, data)
+            yield sink.drain()
+    yield sink.drain()
+
+
+def render_exports(items, render, concurrency=4):
+    """Run render over items on a thread pool, yielding (item, files, error) as each finishes.
+
+    render returns a list of (name, bytes) files for one item. At most
+    2 * concurrency items are in flight, which bounds the files held in
+    memory at once.
+    """
+    def run(item):
+        try:
+            return item, render(item), None
+        except Exception as e:
+            return item, [], e
+
+    executor = ThreadPoolExecutor(max_workers=concurrency)
+    pending = set()
+    try:
+        for item in items:
+            pending.add(executor.submit(run, item))
+            if len(pending) >= concurrency * 2:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                for future in done:
+                    yield future.result()
+        while pending:
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield future.result()
+    finally:
+        # Without waiting: if the client went away, running renders finish on their own
+        # and whatever is still queued is dropped
+        executor.shutdown(wait=False, cancel_futures=True)
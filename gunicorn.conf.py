@@ -0,0 +1,49 @@
+"""Gunicorn settings for production: gunicorn wsgi:app
+
+Every setting can be overridden from the environment (WEB_CONCURRENCY,
+GUNICORN_THREADS, ...) or on the command line.
+"""
+import os
+
+from dotenv import load_dotenv
+
+# Before the defaults below, so values in .env take precedence over them
+load_dotenv()
+
+bind = f"0.0.0.0:{os.getenv('PORT', 5000)}"
+
+# Threaded workers: requests mostly wait on the model's background event loop
+# or the PDF pool, so a few processes with several threads each go a long way
+worker_class = os.getenv("GUNICORN_WORKER_CLASS", "gthread")
+workers = int(os.getenv("WEB_CONCURRENCY", 2))
+threads = int(os.getenv("GUNICORN_THREADS", 8))
+
+# Long enough for a model call plus its retries, and for streamed responses
+timeout = int(os.getenv("GUNICORN_TIMEOUT", 180))
+graceful_timeout = int(os.getenv("GUNICORN_GRACEFUL_TIMEOUT", 30))
+keepalive = int(os.getenv("GUNICORN_KEEPALIVE", 5))
+
+# Restart workers now and then to bound any slow growth in memory
+max_requests = int(os.getenv("GUNICORN_MAX_REQUESTS", 2000))
+max_requests_jitter = int(os.getenv("GUNICORN_MAX_REQUESTS_JITTER", 200))
+
+# Each worker imports the app itself (cheap, since the model and PDF engine are
+# loaded lazily) and so opens its own SQLite connections, event loop and PDF
+# pool; with WARM_UP=True post_worker_init warms up each worker
+preload_app = False
+
+accesslog = os.getenv("GUNICORN_ACCESS_LOG", "-")
+errorlog = "-"
+
+# Worker processes don't share memory, so unless configured otherwise the
+# results and caches go to the SQLite backends every worker can read
+os.environ.setdefault("RESULT_STORE_BACKEND", "sqlite")
+os.environ.setdefault("RECOMMENDATION_CACHE_BACKEND", "sqlite")
+os.environ.setdefault("PDF_CACHE_BACKEND", "sqlite")
+
+
+def post_worker_init(worker):
+    import app
+
+    if app.warm_up_enabled:
+        app.warm_up()
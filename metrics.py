@@ -0,0 +1,232 @@
+import os
+import hmac
+import time
+import cProfile
+import threading
+from contextlib import contextmanager
+
+# Latency buckets in seconds, from template renders up to slow model calls
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+TOKEN_BUCKETS = (50, 100, 250, 500, 1000, 2000, 4000, 8000, 16000)
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _format_labels(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in list(zip(names, values)) + list(extra)]
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    return repr(float(value)) if value != float('inf') else '+Inf'
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help, labelnames=()):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *labelvalues, amount=1):
+        with self._lock:
+            self._values[labelvalues] = self._values.get(labelvalues, 0) + amount
+
+    def samples(self):
+        with self._lock:
+            values = dict(self._values)
+        for labelvalues, value in sorted(values.items()):
+            yield self.name, _format_labels(self.labelnames, labelvalues), value
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (float('inf'),)
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labelvalues):
+        with self._lock:
+            state = self._values.get(labelvalues)
+            if state is None:
+                state = self._values[labelvalues] = [[0] * len(self.buckets), 0.0, 0]
+            counts = state[0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    counts[i] += 1
+                    break
+            state[1] += value
+            state[2] += 1
+
+    def samples(self):
+        with self._lock:
+            values = {key: (list(counts), total, count) for key, (counts, total, count) in self._values.items()}
+        for labelvalues, (counts, total, count) in sorted(values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, counts):
+                cumulative += bucket_count
+                yield (self.name + '_bucket',
+                       _format_labels(self.labelnames, labelvalues, [('le', _format_value(bound))]),
+                       cumulative)
+            labels = _format_labels(self.labelnames, labelvalues)
+            yield self.name + '_sum', labels, total
+            yield self.name + '_count', labels, count
+
+
+class Registry:
+    """Holds the metrics of this process and renders them in the Prometheus text format.
+
+    Collectors are callables returning (name, kind, help, value) tuples,
+    read at scrape time for state that other modules already count.
+    """
+
+    def __init__(self):
+        self._metrics = []
+        self._collectors = []
+
+    def register(self, metric):
+        self._metrics.append(metric)
+        return metric
+
+    def counter(self, name, help, labelnames=()):
+        return self.register(Counter(name, help, labelnames))
+
+    def histogram(self, name, help, labelnames=(), buckets=DEFAULT_BUCKETS):
+        return self.register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        lines = []
+        for metric in self._metrics:
+            lines.append(f'# HELP {metric.name} {metric.help}')
+            lines.append(f'# TYPE {metric.name} {metric.kind}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        for collect in self._collectors:
+            try:
+                for name, kind, help, value in collect():
+                    lines.append(f'# HELP {name} {help}')
+                    lines.append(f'# TYPE {name} {kind}')
+                    lines.append(f'{name} {_format_value(value)}')
+            except Exception as e:
+                print(f"Metrics collector error: {e}")
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+REQUEST_SECONDS = REGISTRY.histogram(
+    'career_compass_request_seconds', 'Time spent handling a request', ('route', 'method', 'status'))
+STAGE_SECONDS = REGISTRY.histogram(
+    'career_compass_stage_seconds', 'Time spent in each stage of a request', ('route', 'stage'))
+MODEL_CALL_SECONDS = REGISTRY.histogram(
+    'career_compass_model_call_seconds', 'Latency of upstream model calls by outcome', ('mode', 'outcome'))
+MODEL_TOKENS = REGISTRY.counter(
+    'career_compass_model_tokens_total', 'Tokens reported by the model', ('kind',))
+MODEL_CALL_TOKENS = REGISTRY.histogram(
+    'career_compass_model_call_tokens', 'Tokens per model call', ('kind',), TOKEN_BUCKETS)
+MODEL_ENDPOINT_SECONDS = REGISTRY.histogram(
+    'career_compass_model_endpoint_seconds', 'Latency of calls to each model pool endpoint by outcome',
+    ('endpoint', 'outcome'))
+MODEL_POOL_EVENTS = REGISTRY.counter(
+    'career_compass_model_pool_events_total', 'Model pool failovers, hedged calls and hedges won', ('event',))
+
+
+def current_route():
+    """Flask endpoint of the active request without its blueprint, or '-' outside a request"""
+    from flask import has_request_context, request
+
+    if has_request_context() and request.endpoint:
+        return request.endpoint.rsplit('.', 1)[-1]
+    return '-'
+
+
+@contextmanager
+def timed(stage, route=None):
+    """Record the time spent in the with-block as one stage of the current route"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_SECONDS.observe(time.perf_counter() - start, route or current_route(), stage)
+
+
+def record_usage(usage):
+    """Count the prompt and response tokens from a response's usage_metadata"""
+    if usage is None:
+        return
+    for kind, attribute in (('prompt', 'prompt_token_count'), ('response', 'candidates_token_count')):
+        count = getattr(usage, attribute, None) or 0
+        if count:
+            MODEL_TOKENS.inc(kind, amount=count)
+            MODEL_CALL_TOKENS.observe(count, kind)
+
+
+class RequestProfiler:
+    """Optional cProfile hook for individual requests.
+
+    Every request is profiled when enabled, and otherwise only requests
+    carrying an X-Profile header equal to header_token (if one is set).
+    Profiles are written to output_dir as <time>-<route>.prof for pstats
+    or snakeviz. Only one request is profiled at a time; others run as
+    normal while a profile is in progress.
+    """
+
+    def __init__(self, enabled=False, header_token=None, output_dir='profiles'):
+        self.enabled = enabled
+        self.header_token = header_token
+        self.output_dir = output_dir
+        self._busy = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build the profiler from PROFILE_* environment variables"""
+        return cls(enabled=os.getenv("PROFILE_REQUESTS", "False").lower() == "true",
+                   header_token=os.getenv("PROFILE_HEADER_TOKEN") or None,
+                   output_dir=os.getenv("PROFILE_DIR", "profiles"))
+
+    def wanted(self, headers):
+        if self.enabled:
+            return True
+        token = headers.get('X-Profile')
+        return bool(self.header_token and token) and hmac.compare_digest(token, self.header_token)
+
+    def start(self):
+        """Start profiling the current thread; returns None if another profile is running"""
+        if not self._busy.acquire(blocking=False):
+            return None
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:
+            # Another profiler (e.g. a debugger) is already active
+            self._busy.release()
+            return None
+        return profile
+
+    def stop(self, profile, route):
+        profile.disable()
+        try:
+            os.makedirs(self.output_dir, exist_ok=True)
+            path = os.path.join(self.output_dir, f"{int(time.time() * 1000)}-{route}.prof")
+            profile.dump_stats(path)
+            print(f"Profile written to {path}")
+            return path
+        finally:
+            self._busy.release()
@@ -0,0 +1,255 @@
+import os
+import re
+import json
+import glob
+import time
+import random
+import asyncio
+import hashlib
+import threading
+
+DEFAULT_MODEL_NAME = "models/gemini-flash-latest"
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmarks', 'corpus')
+
+# How the prompts ask for their answer: "Provide 3 ..." and template lines like "TITLE: [...]"
+REQUESTED_COUNT = re.compile(r'Provide (\d+)')
+REQUESTED_LABEL = re.compile(r'^\s*([A-Z][A-Z ]*): \[', re.MULTILINE)
+
+
+def create_gemini_model(api_key, model_name=DEFAULT_MODEL_NAME):
+    """A google.generativeai GenerativeModel configured with api_key"""
+    import google.generativeai as genai
+
+    genai.configure(api_key=api_key)
+    return genai.GenerativeModel(model_name)
+
+
+class KeyedGeminiModel:
+    """GenerativeModel bound to its own API key rather than the SDK's global configuration.
+
+    google.generativeai keeps one global set of API clients, so each key gets
+    a private client manager. The async client is created on first use,
+    inside the event loop that runs it.
+    """
+
+    def __init__(self, api_key, model_name=DEFAULT_MODEL_NAME):
+        import google.generativeai as genai
+        from google.generativeai import client as genai_client
+
+        self._clients = genai_client._ClientManager()
+        self._clients.configure(api_key=api_key)
+        self.model = genai.GenerativeModel(model_name)
+
+    def generate_content(self, *args, **kwargs):
+        if self.model._client is None:
+            self.model._client = self._clients.make_client('generative')
+        return self.model.generate_content(*args, **kwargs)
+
+    async def generate_content_async(self, *args, **kwargs):
+        if self.model._async_client is None:
+            self.model._async_client = self._clients.make_client('generative_async')
+        return await self.model.generate_content_async(*args, **kwargs)
+
+
+def _split_env(name):
+    return [value.strip() for value in os.getenv(name, "").split(',') if value.strip()]
+
+
+def create_model_pool(api_keys, model_names):
+    """A ModelPool over every key and model name; model names in order of preference"""
+    from model_pool import ModelPool
+
+    models = [(f"{model_name.rsplit('/', 1)[-1]}/key{i + 1}", KeyedGeminiModel(api_key, model_name), tier)
+              for tier, model_name in enumerate(model_names)
+              for i, api_key in enumerate(api_keys)]
+    return ModelPool.from_env(models)
+
+
+def create_model_from_env():
+    """Build the model backend selected by MODEL_BACKEND ('gemini' or 'fake').
+
+    Several keys (GEMINI_API_KEYS) or model names (GEMINI_MODELS) give a
+    ModelPool over all of them instead of a single model.
+    """
+    backend = os.getenv("MODEL_BACKEND", "gemini").lower()
+    if backend == "fake":
+        return FakeModel.from_env()
+    if backend != "gemini":
+        raise ValueError(f"Unknown MODEL_BACKEND: {backend}")
+    api_keys = _split_env("GEMINI_API_KEYS") or _split_env("GEMINI_API_KEY")
+    if not api_keys:
+        raise ValueError("No GEMINI_API_KEY found in environment variables. Please check your .env file.")
+    model_names = _split_env("GEMINI_MODELS") or [os.getenv("GEMINI_MODEL", DEFAULT_MODEL_NAME)]
+    if len(api_keys) == 1 and len(model_names) == 1:
+        return create_gemini_model(api_keys[0], model_names[0])
+    return create_model_pool(api_keys, model_names)
+
+
+class LazyModel:
+    """Builds the model with factory on first use and forwards calls to it.
+
+    Keeps the google.generativeai import and the API key check off the
+    import path. If the factory fails, the error is raised to the caller
+    and the next call tries again.
+    """
+
+    def __init__(self, factory):
+        self.factory = factory
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def loaded(self):
+        return self._model is not None
+
+    def load(self):
+        """Build the model if needed and return it"""
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    self._model = self.factory()
+        return self._model
+
+    def generate_content(self, *args, **kwargs):
+        return self.load().generate_content(*args, **kwargs)
+
+    async def generate_content_async(self, *args, **kwargs):
+        return await self.load().generate_content_async(*args, **kwargs)
+
+
+def _narrow_response(text, prompt, generation_config, is_higher_study):
+    """Cut a recorded response down to the recommendations and fields the prompt asks for.
+
+    Returns the text unchanged when the prompt wants the usual three full
+    recommendations in the text format.
+    """
+    from recommendation_parser import HIGHER_STUDY_FIELDS, JOB_FIELDS, parse_recommendations
+
+    fields = HIGHER_STUDY_FIELDS if is_higher_study else JOB_FIELDS
+    json_mode = (generation_config or {}).get('response_mime_type') == 'application/json'
+    if json_mode:
+        keys = list(generation_config['response_schema']['items']['properties'])
+    else:
+        keys = [fields[label][0] for label in REQUESTED_LABEL.findall(prompt) if label in fields] \
+            or [key for key, _ in fields.values()]
+    count = REQUESTED_COUNT.search(prompt)
+    count = int(count.group(1)) if count else 3
+    if not json_mode and count == 3 and len(keys) == len(fields):
+        return text
+    records = [{key: rec[key] for key in keys if key in rec}
+               for rec in parse_recommendations(text, is_higher_study)[:count]]
+    if json_mode:
+        return json.dumps(records, ensure_ascii=False)
+    labels = {key: (label, is_list) for label, (key, is_list) in fields.items()}
+    lines = []
+    for i, rec in enumerate(records, 1):
+        lines.append(f"--- RECOMMENDATION {i}")
+        for key, value in rec.items():
+            label, is_list = labels[key]
+            lines.append(f"{label}: {', '.join(value) if is_list else value}")
+    return '\n'.join(lines) + '\n'
+
+
+def _read_corpus(corpus_dir, pattern):
+    texts = []
+    for path in sorted(glob.glob(os.path.join(corpus_dir, pattern))):
+        with open(path, encoding='utf-8') as f:
+            texts.append(f.read())
+    return texts
+
+
+class FakeModelError(Exception):
+    """Injected failure; .code mirrors the HTTP status of a google.api_core error"""
+
+    def __init__(self, code):
+        super().__init__(f"Injected model error {code}")
+        self.code = code
+
+
+class FakeUsage:
+    def __init__(self, prompt_token_count, candidates_token_count):
+        self.prompt_token_count = prompt_token_count
+        self.candidates_token_count = candidates_token_count
+        self.total_token_count = prompt_token_count + candidates_token_count
+
+
+class FakeResponse:
+    def __init__(self, text, usage_metadata=None):
+        self.text = text
+        self.usage_metadata = usage_metadata
+
+
+class FakeModel:
+    """Deterministic stand-in for GenerativeModel that replays recorded responses.
+
+    Responses come from the corpus files: higher_*.txt for Higher Studies
+    prompts and job_*.txt otherwise. The same prompt always gets the same
+    response. The response is cut down to the number of recommendations and
+    the fields the prompt or response schema asks for, and when a JSON
+    response_mime_type is requested it is returned as a JSON array, as
+    Gemini's structured output would. Latency is a fixed base plus seeded
+    jitter plus token_latency per response token, and error_rate injects
+    429/503 errors that look like quota or server failures.
+    """
+
+    def __init__(self, corpus_dir=DEFAULT_CORPUS_DIR, latency=0.0, latency_jitter=0.0,
+                 error_rate=0.0, seed=0, chunk_size=64, token_latency=0.0):
+        self.responses = {goal: _read_corpus(corpus_dir, f'{goal}_*.txt') for goal in ('higher', 'job')}
+        if not self.responses['higher'] or not self.responses['job']:
+            raise ValueError(f"FakeModel needs higher_*.txt and job_*.txt responses in {corpus_dir}")
+        self.latency = latency
+        self.latency_jitter = latency_jitter
+        self.token_latency = token_latency
+        self.error_rate = error_rate
+        self.chunk_size = chunk_size
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        """Build the fake from FAKE_MODEL_* environment variables"""
+        return cls(corpus_dir=os.getenv("FAKE_MODEL_CORPUS", DEFAULT_CORPUS_DIR),
+                   latency=float(os.getenv("FAKE_MODEL_LATENCY", 0.0)),
+                   latency_jitter=float(os.getenv("FAKE_MODEL_LATENCY_JITTER", 0.0)),
+                   error_rate=float(os.getenv("FAKE_MODEL_ERROR_RATE", 0.0)),
+                   seed=int(os.getenv("FAKE_MODEL_SEED", 0)),
+                   token_latency=float(os.getenv("FAKE_MODEL_TOKEN_LATENCY", 0.0)))
+
+    def _plan(self, prompt, generation_config=None):
+        """Pick the response, the delay and whether to fail for one call"""
+        with self._lock:
+            delay = self.latency + self._random.uniform(0, self.latency_jitter)
+            failure = self._random.choice((429, 503)) if self._random.random() < self.error_rate else None
+        is_higher_study = 'higher education' in prompt
+        responses = self.responses['higher' if is_higher_study else 'job']
+        digest = int(hashlib.sha256(prompt.encode('utf-8')).hexdigest(), 16)
+        text = _narrow_response(responses[digest % len(responses)], prompt, generation_config, is_higher_study)
+        usage = FakeUsage(len(prompt) // 4, len(text) // 4)
+        return text, usage, delay + usage.candidates_token_count * self.token_latency, failure
+
+    def generate_content(self, prompt, stream=False, generation_config=None, **kwargs):
+        text, usage, delay, failure = self._plan(prompt, generation_config)
+        if not stream:
+            time.sleep(delay)
+            if failure:
+                raise FakeModelError(failure)
+            return FakeResponse(text, usage)
+        return self._stream(text, usage, delay, failure)
+
+    def _stream(self, text, usage, delay, failure):
+        chunks = [text[i:i + self.chunk_size] for i in range(0, len(text), self.chunk_size)]
+        # First chunk after a quarter of the latency, the rest spread evenly
+        time.sleep(delay / 4)
+        if failure:
+            raise FakeModelError(failure)
+        for i, chunk in enumerate(chunks):
+            # Like Gemini, usage is reported with the final chunk
+            yield FakeResponse(chunk, usage if i == len(chunks) - 1 else None)
+            time.sleep(delay * 3 / 4 / len(chunks))
+
+    async def generate_content_async(self, prompt, generation_config=None, **kwargs):
+        text, usage, delay, failure = self._plan(prompt, generation_config)
+        await asyncio.sleep(delay)
+        if failure:
+            raise FakeModelError(failure)
+        return FakeResponse(text, usage)
@@ -0,0 +1,174 @@
+import os
+import time
+import asyncio
+import itertools
+import threading
+
+from metrics import MODEL_CALL_SECONDS, record_usage
+from rate_limit import RateLimiter, backoff_delay, is_retryable
+
+
+class AsyncModelClient:
+    """Runs model calls on a background event loop.
+
+    At most max_concurrency calls are in flight at once, and concurrent
+    requests that share a key (the normalized profile and goal) are coalesced
+    into a single upstream call whose response they all receive. Calls wait
+    on the optional rate limiter, and quota or transient server errors are
+    retried with jittered exponential backoff. stream() applies the same
+    limits to streamed responses, which can't be coalesced.
+    """
+
+    def __init__(self, model, max_concurrency=8, timeout=120, rate_limiter=None,
+                 max_retries=3, retry_base_delay=1.0, retry_max_delay=20.0):
+        self.model = model
+        self.max_concurrency = max_concurrency
+        self.timeout = timeout
+        self.rate_limiter = rate_limiter
+        self.max_retries = max_retries
+        self.retry_base_delay = retry_base_delay
+        self.retry_max_delay = retry_max_delay
+        self.calls = 0
+        self.coalesced = 0
+        self.retries = 0
+        self._loop = None
+        self._semaphore = None
+        self._inflight = {}
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls, model):
+        """Build the client from MODEL_* environment variables"""
+        return cls(model,
+                   max_concurrency=int(os.getenv("MODEL_MAX_CONCURRENCY", 8)),
+                   timeout=float(os.getenv("MODEL_TIMEOUT", 120)),
+                   rate_limiter=RateLimiter.from_env(),
+                   max_retries=int(os.getenv("MODEL_MAX_RETRIES", 3)),
+                   retry_base_delay=float(os.getenv("MODEL_RETRY_BASE_DELAY", 1.0)),
+                   retry_max_delay=float(os.getenv("MODEL_RETRY_MAX_DELAY", 20.0)))
+
+    def _get_loop(self):
+        # Started on first use so that forked workers each get their own loop
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(target=loop.run_forever, name='model-client', daemon=True).start()
+                self._semaphore = asyncio.Semaphore(self.max_concurrency)
+                self._loop = loop
+            return self._loop
+
+    async def generate_async(self, key, prompt, generation_config=None):
+        """Return the model response for prompt, sharing one call per key"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(self._call(prompt, generation_config))
+            self._inflight[key] = task
+            task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        else:
+            self.coalesced += 1
+        # shield so one caller giving up does not cancel the call for the others
+        return await asyncio.shield(task)
+
+    async def _call(self, prompt, generation_config):
+        attempt = 0
+        while True:
+            try:
+                return await self._attempt(prompt, generation_config)
+            except Exception as e:
+                if attempt >= self.max_retries or not is_retryable(e):
+                    raise
+                delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                print(f"Model call failed ({e}); retrying in {delay:.1f}s")
+                attempt += 1
+                self.retries += 1
+                # Back off without holding a concurrency slot
+                await asyncio.sleep(delay)
+
+    async def _attempt(self, prompt, generation_config):
+        async with self._semaphore:
+            reserved = await self.rate_limiter.acquire(prompt) if self.rate_limiter else 0
+            self.calls += 1
+            start = time.perf_counter()
+            try:
+                response = await self.model.generate_content_async(prompt, generation_config=generation_config)
+            except Exception:
+                MODEL_CALL_SECONDS.observe(time.perf_counter() - start, 'async', 'error')
+                raise
+            MODEL_CALL_SECONDS.observe(time.perf_counter() - start, 'async', 'ok')
+            record_usage(getattr(response, 'usage_metadata', None))
+            if self.rate_limiter:
+                usage = getattr(response, 'usage_metadata', None)
+                self.rate_limiter.settle(reserved, getattr(usage, 'total_token_count', 0))
+            return response
+
+    def generate(self, key, prompt, generation_config=None):
+        """Blocking wrapper for sync request handlers"""
+        future = asyncio.run_coroutine_threadsafe(self.generate_async(key, prompt, generation_config),
+                                                  self._get_loop())
+        return future.result(timeout=self.timeout)
+
+    def generate_all(self, calls):
+        """Blocking wrapper running several (key, prompt, generation_config) calls concurrently"""
+        loop = self._get_loop()
+        futures = [asyncio.run_coroutine_threadsafe(self.generate_async(*call), loop) for call in calls]
+        return [future.result(timeout=self.timeout) for future in futures]
+
+    def stream(self, prompt, generation_config=None):
+        """Yield the chunks of a streamed response, for sync request handlers.
+
+        Holds a concurrency slot and waits on the rate limiter like any other
+        call. Errors before the first chunk are retried with backoff; later
+        ones are raised, as the caller has already used the earlier text.
+        """
+        loop = self._get_loop()
+        attempt = 0
+        while True:
+            asyncio.run_coroutine_threadsafe(self._semaphore.acquire(), loop).result()
+            try:
+                reserved = (asyncio.run_coroutine_threadsafe(self.rate_limiter.acquire(prompt), loop).result()
+                            if self.rate_limiter else 0)
+                self.calls += 1
+                start = time.perf_counter()
+                try:
+                    chunks = iter(self.model.generate_content(prompt, stream=True,
+                                                              generation_config=generation_config))
+                    first = next(chunks, None)
+                except Exception as e:
+                    MODEL_CALL_SECONDS.observe(time.perf_counter() - start, 'stream', 'error')
+                    if attempt >= self.max_retries or not is_retryable(e):
+                        raise
+                    delay = backoff_delay(attempt, self.retry_base_delay, self.retry_max_delay)
+                    print(f"Model stream failed ({e}); retrying in {delay:.1f}s")
+                else:
+                    usage = None
+                    try:
+                        if first is not None:
+                            for chunk in itertools.chain((first,), chunks):
+                                usage = getattr(chunk, 'usage_metadata', None) or usage
+                                yield chunk
+                    except Exception:
+                        MODEL_CALL_SECONDS.observe(time.perf_counter() - start, 'stream', 'error')
+                        raise
+                    MODEL_CALL_SECONDS.observe(time.perf_counter() - start, 'stream', 'ok')
+                    record_usage(usage)
+                    if self.rate_limiter:
+                        # The buckets belong to the event loop
+                        loop.call_soon_threadsafe(self.rate_limiter.settle, reserved,
+                                                  getattr(usage, 'total_token_count', 0))
+                    return
+            finally:
+                # Also reached when the consumer stops reading early
+                loop.call_soon_threadsafe(self._semaphore.release)
+            attempt += 1
+            self.retries += 1
+            # Back off without holding a concurrency slot
+            time.sleep(delay)
+
+    def stats(self):
+        return {
+            'max_concurrency': self.max_concurrency,
+            'in_flight': len(self._inflight),
+            'calls': self.calls,
+            'coalesced': self.coalesced,
+            'retries': self.retries,
+        }
@@ -0,0 +1,263 @@
+import os
+import time
+import asyncio
+import threading
+from collections import deque
+
+from metrics import MODEL_ENDPOINT_SECONDS, MODEL_POOL_EVENTS
+from rate_limit import is_retryable
+
+# Fewer samples than this and an endpoint's latency is treated as unknown
+MIN_SAMPLES = 5
+
+
+def _percentile(values, q):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(q * len(values)))]
+
+
+class Endpoint:
+    """One model name behind one API key, with rolling latency and error statistics.
+
+    The last window calls from the last window_seconds are kept. Calls
+    abandoned after losing a hedge count toward latency (they took at least
+    that long) but not toward errors. A quota error (429) takes the endpoint
+    out of rotation for cooldown seconds.
+    """
+
+    def __init__(self, name, model, tier=0, window=100, window_seconds=120):
+        self.name = name
+        self.model = model
+        self.tier = tier
+        self.window_seconds = window_seconds
+        self.calls = 0
+        self.errors = 0
+        self.in_flight = 0
+        self.cooldown_until = 0.0
+        self._samples = deque(maxlen=window)  # (finished at, seconds, ok / None if abandoned)
+        self._lock = threading.Lock()
+
+    def start(self):
+        with self._lock:
+            self.in_flight += 1
+            self.calls += 1
+        return time.perf_counter()
+
+    def finish(self, started, ok, error=None, cooldown=0.0):
+        seconds = time.perf_counter() - started
+        now = time.monotonic()
+        with self._lock:
+            self.in_flight -= 1
+            self._samples.append((now, seconds, ok))
+            if ok is False:
+                self.errors += 1
+                if getattr(error, 'code', None) == 429:
+                    self.cooldown_until = now + cooldown
+        outcome = 'ok' if ok else 'error' if ok is False else 'abandoned'
+        MODEL_ENDPOINT_SECONDS.observe(seconds, self.name, outcome)
+
+    def _recent(self):
+        cutoff = time.monotonic() - self.window_seconds
+        with self._lock:
+            return [sample for sample in self._samples if sample[0] >= cutoff]
+
+    def latency(self, q):
+        """Rolling latency percentile in seconds, or None without enough samples"""
+        samples = self._recent()
+        if len(samples) < MIN_SAMPLES:
+            return None
+        return _percentile([seconds for _, seconds, _ in samples], q)
+
+    def error_rate(self):
+        samples = self._recent()
+        if len(samples) < MIN_SAMPLES:
+            return 0.0
+        return sum(ok is False for _, _, ok in samples) / len(samples)
+
+    def cooling_down(self):
+        return self.cooldown_until > time.monotonic()
+
+    def stats(self):
+        return {
+            'name': self.name,
+            'tier': self.tier,
+            'calls': self.calls,
+            'errors': self.errors,
+            'in_flight': self.in_flight,
+            'samples': len(self._recent()),
+            'error_rate': round(self.error_rate(), 3),
+            'p50': self.latency(0.5),
+            'p95': self.latency(0.95),
+            'cooling_down': self.cooling_down(),
+        }
+
+
+class ModelPool:
+    """Spreads model calls over several endpoints (API keys x model names) by their health.
+
+    Endpoints are healthy when they aren't cooling down after a quota error,
+    their rolling error rate is at most max_error_rate and their rolling p95
+    latency is within slo seconds. Calls go to the most preferred tier (model
+    names are listed in order of preference) among the healthy endpoints,
+    then to the one with the fewest calls in flight. When none is healthy
+    the endpoint with the lowest p95 is used, which fails traffic over to a
+    faster or smaller model. A retryable error moves the call to the next
+    endpoint right away. With hedge=True a call still running after its
+    endpoint's p95 (at most slo) is raced against the next best endpoint.
+
+    Offers the generate_content / generate_content_async interface of a
+    single model, so it can stand in for one anywhere.
+    """
+
+    def __init__(self, endpoints, slo=20.0, max_error_rate=0.5, cooldown=30.0, hedge=False):
+        if not endpoints:
+            raise ValueError("ModelPool needs at least one endpoint")
+        self.endpoints = endpoints
+        self.slo = slo
+        self.max_error_rate = max_error_rate
+        self.cooldown = cooldown
+        self.hedge = hedge
+        self.failovers = 0
+        self.hedges = 0
+        self.hedges_won = 0
+
+    @classmethod
+    def from_env(cls, models):
+        """Build the pool from (name, model, tier) tuples and MODEL_POOL_* environment variables"""
+        window = int(os.getenv("MODEL_POOL_WINDOW", 100))
+        window_seconds = float(os.getenv("MODEL_POOL_WINDOW_SECONDS", 120))
+        endpoints = [Endpoint(name, model, tier, window, window_seconds) for name, model, tier in models]
+        return cls(endpoints,
+                   slo=float(os.getenv("MODEL_POOL_SLO", 20)),
+                   max_error_rate=float(os.getenv("MODEL_POOL_MAX_ERROR_RATE", 0.5)),
+                   cooldown=float(os.getenv("MODEL_POOL_COOLDOWN", 30)),
+                   hedge=os.getenv("MODEL_POOL_HEDGE", "False").lower() == "true")
+
+    def healthy(self, endpoint):
+        p95 = endpoint.latency(0.95)
+        return (not endpoint.cooling_down() and endpoint.error_rate() <= self.max_error_rate
+                and (p95 is None or p95 <= self.slo))
+
+    def ranked(self, exclude=()):
+        """Endpoints not in exclude, best first"""
+        def rank(endpoint):
+            if self.healthy(endpoint):
+                return (0, endpoint.tier, endpoint.in_flight, endpoint.latency(0.5) or 0.0)
+            return (1, endpoint.cooling_down(), endpoint.error_rate() > self.max_error_rate,
+                    endpoint.latency(0.95) or 0.0)
+        return sorted((endpoint for endpoint in self.endpoints if endpoint not in exclude), key=rank)
+
+    def _failed_over(self, endpoint, error):
+        print(f"Model endpoint {endpoint.name} failed ({error}); failing over")
+        self.failovers += 1
+        MODEL_POOL_EVENTS.inc('failover')
+
+    async def _call(self, endpoint, prompt, kwargs):
+        started = endpoint.start()
+        try:
+            response = await endpoint.model.generate_content_async(prompt, **kwargs)
+        except asyncio.CancelledError:
+            endpoint.finish(started, None)
+            raise
+        except Exception as e:
+            endpoint.finish(started, False, e, self.cooldown)
+            raise
+        endpoint.finish(started, True)
+        return response
+
+    async def _hedged(self, primary, backup, prompt, kwargs):
+        delay = min(self.slo, primary.latency(0.95) or self.slo)
+        first = asyncio.ensure_future(self._call(primary, prompt, kwargs))
+        pending = {first}
+        try:
+            done, pending = await asyncio.wait(pending, timeout=delay)
+            if done:
+                return first.result()
+            self.hedges += 1
+            MODEL_POOL_EVENTS.inc('hedge')
+            second = asyncio.ensure_future(self._call(backup, prompt, kwargs))
+            pending = {first, second}
+            error = None
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    if task.exception() is None:
+                        if task is second:
+                            self.hedges_won += 1
+                            MODEL_POOL_EVENTS.inc('hedge_won')
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            # The slower call, or both if our caller gave up
+            for task in pending:
+                task.cancel()
+
+    async def generate_content_async(self, prompt, **kwargs):
+        tried = []
+        error = None
+        while True:
+            ranked = self.ranked(tried)
+            if not ranked:
+                raise error
+            endpoint = ranked[0]
+            try:
+                if self.hedge and len(ranked) > 1:
+                    tried += ranked[:2]
+                    return await self._hedged(endpoint, ranked[1], prompt, kwargs)
+                tried.append(endpoint)
+                return await self._call(endpoint, prompt, kwargs)
+            except Exception as e:
+                # A bad request fails the same way everywhere
+                if not is_retryable(e):
+                    raise
+                error = e
+                self._failed_over(endpoint, e)
+
+    def generate_content(self, prompt, stream=False, **kwargs):
+        """Synchronous call; a stream fails over until its first chunk has arrived"""
+        error = None
+        for endpoint in self.ranked():
+            started = endpoint.start()
+            try:
+                response = endpoint.model.generate_content(prompt, stream=stream, **kwargs)
+                if not stream:
+                    endpoint.finish(started, True)
+                    return response
+                chunks = iter(response)
+                first = next(chunks, None)
+            except Exception as e:
+                endpoint.finish(started, False, e, self.cooldown)
+                if not is_retryable(e):
+                    raise
+                error = e
+                self._failed_over(endpoint, e)
+                continue
+            return self._relay(endpoint, started, first, chunks)
+        raise error
+
+    def _relay(self, endpoint, started, first, chunks):
+        ok = None
+        try:
+            if first is not None:
+                yield first
+                yield from chunks
+            ok = True
+        except Exception as e:
+            ok = False
+            endpoint.finish(started, False, e, self.cooldown)
+            raise
+        finally:
+            # Also reached when the consumer stops early, which counts as abandoned
+            if ok is not False:
+                endpoint.finish(started, ok)
+
+    def stats(self):
+        return {
+            'slo': self.slo,
+            'hedge': self.hedge,
+            'failovers': self.failovers,
+            'hedges': self.hedges,
+            'hedges_won': self.hedges_won,
+            'endpoints': [endpoint.stats() for endpoint in self.endpoints],
+        }
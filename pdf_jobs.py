@@ -0,0 +1,284 @@
+import os
+import io
+import time
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FuturesTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+
+from cache import MemoryBackend, SQLiteBackend
+from metrics import STAGE_SECONDS
+
+
+def render_pdf(html_content):
+    """Render an HTML document to PDF bytes (runs inside a pool worker)"""
+    from xhtml2pdf import pisa
+
+    pdf_file = io.BytesIO()
+    status = pisa.CreatePDF(html_content, dest=pdf_file)
+    if status.err:
+        raise RuntimeError(f"PDF rendering failed with {status.err} error(s)")
+    return pdf_file.getvalue()
+
+
+def render_pdf_timed(html_content):
+    """render_pdf, also returning the seconds the worker spent rendering"""
+    start = time.perf_counter()
+    pdf = render_pdf(html_content)
+    return pdf, time.perf_counter() - start
+
+
+def load_engine():
+    """Import xhtml2pdf in a pool worker ahead of its first render"""
+    from xhtml2pdf import pisa  # noqa: F401
+    return os.getpid()
+
+
+def lower_priority(niceness):
+    """Pool initializer that makes a worker yield the CPU to everything else"""
+    try:
+        os.nice(niceness)
+    except (AttributeError, OSError):
+        pass
+
+
+def content_hash(html_content):
+    return hashlib.sha256(html_content.encode('utf-8')).hexdigest()
+
+
+class PdfJobManager:
+    """Renders PDFs off the request thread and caches finished documents.
+
+    Jobs are identified by the hash of their HTML, so submitting the same
+    report twice joins the running job or returns the cached PDF instead of
+    rendering again.
+
+    Documents nobody has asked for yet can be prefetched on a separate
+    single-process pool running at a lower CPU priority. A download that
+    arrives while its prefetch is still queued there moves it to the main
+    pool. Only the newest max_pending prefetches stay queued, and unclaimed
+    prefetched PDFs are evicted oldest first beyond prefetch_max_bytes.
+
+    With shared cache and state backends, any worker process can report on
+    and serve a job another worker is rendering: 'pending' and 'failed'
+    markers are kept in the state backend until the PDF lands in the cache.
+    """
+
+    def __init__(self, max_workers=2, cache_size=256, cache_ttl=3600,
+                 prefetch_max_pending=16, prefetch_max_bytes=32 * 1024 * 1024, prefetch_niceness=10,
+                 cache_backend=None, state_backend=None):
+        self.max_workers = max_workers
+        self.prefetch_max_pending = prefetch_max_pending
+        self.prefetch_max_bytes = prefetch_max_bytes
+        self.prefetch_niceness = prefetch_niceness
+        self._executor = None
+        self._prefetch_executor = None
+        self._jobs = {}
+        self._prefetching = OrderedDict()  # job ID -> future, until rendered or downloaded
+        self._prefetched = OrderedDict()   # job ID -> PDF size, rendered but not downloaded yet
+        self._prefetched_bytes = 0
+        # Finished PDFs; a shared backend lets every worker process serve them
+        self._results = cache_backend if cache_backend is not None else MemoryBackend(max_entries=cache_size, ttl=cache_ttl)
+        # 'pending' or 'failed' per job; the TTL clears markers left by a worker that died mid-render
+        self._states = state_backend if state_backend is not None else MemoryBackend(max_entries=1024, ttl=600)
+        # Reentrant: cancelling a queued future runs _finish on the cancelling thread
+        self._lock = threading.RLock()
+        self.prefetch_submitted = 0
+        self.prefetch_used = 0
+        self.prefetch_discarded = 0
+
+    @classmethod
+    def from_env(cls):
+        """Build the manager from PDF_* environment variables"""
+        kind = os.getenv("PDF_CACHE_BACKEND", "memory").lower()
+        size = int(os.getenv("PDF_CACHE_SIZE", 256))
+        ttl = int(os.getenv("PDF_CACHE_TTL", 3600))
+        if kind == "sqlite":
+            path = os.getenv("PDF_CACHE_PATH", "pdfs.sqlite3")
+            cache_backend = SQLiteBackend(path, max_entries=size, ttl=ttl, table='pdfs', binary=True)
+            state_backend = SQLiteBackend(path, max_entries=max(1024, size), ttl=600, table='pdf_jobs')
+        elif kind == "memory":
+            cache_backend = state_backend = None
+        else:
+            raise ValueError(f"Unknown PDF_CACHE_BACKEND: {kind}")
+        return cls(max_workers=int(os.getenv("PDF_WORKERS", 2)),
+                   cache_size=size,
+                   cache_ttl=ttl,
+                   cache_backend=cache_backend,
+                   state_backend=state_backend,
+                   prefetch_max_pending=int(os.getenv("PDF_PREFETCH_MAX_PENDING", 16)),
+                   prefetch_max_bytes=int(os.getenv("PDF_PREFETCH_MAX_MB", 32)) * 1024 * 1024,
+                   prefetch_niceness=int(os.getenv("PDF_PREFETCH_NICE", 10)))
+
+    def _get_executor(self, prefetch=False):
+        # spawn keeps workers independent of the web server's threads and sockets
+        if prefetch:
+            if self._prefetch_executor is None:
+                self._prefetch_executor = ProcessPoolExecutor(max_workers=1,
+                                                              mp_context=multiprocessing.get_context('spawn'),
+                                                              initializer=lower_priority,
+                                                              initargs=(self.prefetch_niceness,))
+            return self._prefetch_executor
+        if self._executor is None:
+            self._executor = ProcessPoolExecutor(max_workers=self.max_workers,
+                                                 mp_context=multiprocessing.get_context('spawn'))
+        return self._executor
+
+    def _start(self, job_id, html_content, prefetch=False):
+        submitted_at = time.perf_counter()
+        self._states.set(job_id, 'pending')
+        try:
+            future = self._get_executor(prefetch).submit(render_pdf_timed, html_content)
+        except BrokenProcessPool:
+            # A worker died (e.g. OOM-killed); start a fresh pool
+            if prefetch:
+                self._prefetch_executor = None
+            else:
+                self._executor = None
+            future = self._get_executor(prefetch).submit(render_pdf_timed, html_content)
+        self._jobs[job_id] = future
+        future.add_done_callback(lambda f: self._finish(job_id, f, submitted_at))
+        return future
+
+    def submit(self, html_content):
+        """Queue an HTML document for rendering and return its job ID"""
+        job_id = content_hash(html_content)
+        with self._lock:
+            future = self._prefetching.pop(job_id, None)
+            if future is not None:
+                self.prefetch_used += 1
+                if future.cancel():
+                    # Still queued behind other prefetches; render it on the main pool now
+                    self._start(job_id, html_content)
+                return job_id
+            if job_id in self._prefetched:
+                self._prefetched_bytes -= self._prefetched.pop(job_id)
+                self.prefetch_used += 1
+            if job_id in self._jobs or self._results.contains(job_id):
+                return job_id
+            self._start(job_id, html_content)
+        return job_id
+
+    def prefetch(self, html_content):
+        """Render a document ahead of a likely download on the low-priority pool and return its job ID"""
+        job_id = content_hash(html_content)
+        with self._lock:
+            if job_id in self._jobs or self._results.contains(job_id):
+                return job_id
+            self._prefetching[job_id] = self._start(job_id, html_content, prefetch=True)
+            self.prefetch_submitted += 1
+            # Older prefetches belong to users who have likely moved on; drop those still queued
+            for stale_id, stale in list(self._prefetching.items()):
+                if len(self._prefetching) <= self.prefetch_max_pending:
+                    break
+                if stale.cancel():
+                    self._prefetching.pop(stale_id, None)
+                    self.prefetch_discarded += 1
+        return job_id
+
+    def cancel_prefetch(self, job_ids):
+        """Drop prefetches that are still queued; running and finished ones are kept"""
+        with self._lock:
+            for job_id in job_ids:
+                future = self._prefetching.get(job_id)
+                if future is not None and future.cancel():
+                    self._prefetching.pop(job_id, None)
+                    self.prefetch_discarded += 1
+
+    def _finish(self, job_id, future, submitted_at):
+        with self._lock:
+            if self._jobs.get(job_id) is future:
+                del self._jobs[job_id]
+            if future.cancelled():
+                self._states.delete(job_id)
+                return
+            unclaimed = self._prefetching.pop(job_id, None) is not None
+            error = future.exception()
+            if error is None:
+                pdf, render_seconds = future.result()
+                elapsed = time.perf_counter() - submitted_at
+                stage = 'pdf_prefetch' if unclaimed else 'pdf_render'
+                STAGE_SECONDS.observe(render_seconds, 'pdf_worker', stage)
+                if not unclaimed:
+                    STAGE_SECONDS.observe(max(0.0, elapsed - render_seconds), 'pdf_worker', 'pdf_queue')
+                self._results.set(job_id, pdf)
+                self._states.delete(job_id)
+                if unclaimed:
+                    self._hold_prefetched(job_id, len(pdf))
+            else:
+                print(f"PDF job {job_id} failed: {error}")
+                self._states.set(job_id, 'failed')
+
+    def _hold_prefetched(self, job_id, size):
+        self._prefetched[job_id] = size
+        self._prefetched_bytes += size
+        while self._prefetched_bytes > self.prefetch_max_bytes:
+            stale_id, stale_size = self._prefetched.popitem(last=False)
+            self._prefetched_bytes -= stale_size
+            self._results.delete(stale_id)
+            self.prefetch_discarded += 1
+
+    def status(self, job_id):
+        """Return 'done', 'pending', 'failed', or None for an unknown job"""
+        # Read before the cache, as _finish caches the PDF before clearing the marker
+        state = self._states.get(job_id)
+        if self._results.contains(job_id):
+            return 'done'
+        if job_id in self._jobs:
+            return 'pending'
+        # Possibly a job running in another worker process
+        return state
+
+    def result(self, job_id, timeout=None):
+        """Return the PDF bytes, waiting up to timeout seconds for a running job.
+
+        Returns None for unknown or failed jobs and raises
+        concurrent.futures.TimeoutError if the job is still running.
+        """
+        with self._lock:
+            # Under the lock: _finish drops the job and caches its PDF in one step
+            future = self._jobs.get(job_id)
+        if future is None:
+            return self._wait_shared(job_id, timeout)
+        pdf, _ = future.result(timeout=timeout)
+        return pdf
+
+    def _wait_shared(self, job_id, timeout, interval=0.1):
+        """Return a cached PDF, polling the shared cache while another worker process renders it"""
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while True:
+            # The marker first: _finish caches the PDF before clearing it
+            state = self._states.get(job_id)
+            # The blob is only loaded once it is there
+            if state != 'pending' or self._results.contains(job_id):
+                return self._results.get(job_id)
+            if deadline is not None and time.monotonic() >= deadline:
+                raise FuturesTimeoutError()
+            time.sleep(interval)
+
+    def warm_up(self, timeout=60):
+        """Start the worker processes and import the PDF engine in each of them"""
+        futures = [self._get_executor().submit(load_engine) for _ in range(self.max_workers)]
+        for future in futures:
+            future.result(timeout=timeout)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'jobs': len(self._jobs),
+                'prefetch_pending': len(self._prefetching),
+                'prefetch_held': len(self._prefetched),
+                'prefetch_bytes': self._prefetched_bytes,
+                'prefetch_submitted': self.prefetch_submitted,
+                'prefetch_used': self.prefetch_used,
+                'prefetch_discarded': self.prefetch_discarded,
+            }
+
+    def shutdown(self):
+        for executor in (self._executor, self._prefetch_executor):
+            if executor is not None:
+                executor.shutdown(wait=False, cancel_futures=True)
+        self._executor = None
+        self._prefetch_executor = None
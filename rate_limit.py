@@ -0,0 +1,128 @@
+import os
+import time
+import random
+import asyncio
+import threading
+
+# HTTP statuses worth retrying: quota exhaustion and transient server errors
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class ServiceBusy(Exception):
+    """Raised when the admission queue is full and the request should be shed"""
+
+
+class TokenBucket:
+    """Token bucket refilled continuously at rate_per_minute, holding up to capacity.
+
+    Must be used from a single event loop. The balance may go negative when
+    a call turns out to cost more than was reserved, which delays later
+    callers until it is paid back.
+    """
+
+    def __init__(self, rate_per_minute, capacity=None):
+        self.rate = rate_per_minute / 60.0
+        self.capacity = capacity or rate_per_minute
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = None
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self, amount=1):
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        # Waiters queue on the lock so they are served in arrival order
+        async with self._lock:
+            amount = min(amount, self.capacity)
+            self._refill()
+            while self.tokens < amount:
+                await asyncio.sleep((amount - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= amount
+
+    def debit(self, amount):
+        self._refill()
+        self.tokens -= amount
+
+
+class RateLimiter:
+    """Client-side limiter for a requests-per-minute and tokens-per-minute quota"""
+
+    def __init__(self, rpm=0, tpm=0, expected_output_tokens=1500):
+        self.requests = TokenBucket(rpm) if rpm else None
+        self.tokens = TokenBucket(tpm) if tpm else None
+        self.expected_output_tokens = expected_output_tokens
+
+    @classmethod
+    def from_env(cls):
+        """Build the limiter from MODEL_RPM / MODEL_TPM (0 disables a limit)"""
+        return cls(rpm=int(os.getenv("MODEL_RPM", 60)),
+                   tpm=int(os.getenv("MODEL_TPM", 1000000)),
+                   expected_output_tokens=int(os.getenv("MODEL_EXPECTED_OUTPUT_TOKENS", 1500)))
+
+    def estimate_tokens(self, prompt):
+        # Roughly four characters per token for English text
+        return len(prompt) // 4 + self.expected_output_tokens
+
+    async def acquire(self, prompt):
+        """Wait until the quota allows a call; returns the number of tokens reserved"""
+        reserved = self.estimate_tokens(prompt)
+        if self.requests:
+            await self.requests.acquire()
+        if self.tokens:
+            await self.tokens.acquire(reserved)
+        return reserved
+
+    def settle(self, reserved, used):
+        """Correct the token bucket once the real usage of a call is known"""
+        if self.tokens and used:
+            self.tokens.debit(used - reserved)
+
+
+def is_retryable(error):
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError)):
+        return True
+    # google.api_core exceptions carry the HTTP status as .code
+    return getattr(error, 'code', None) in RETRYABLE_STATUS
+
+
+def backoff_delay(attempt, base_delay, max_delay):
+    """Exponential backoff with full jitter"""
+    return random.uniform(0, min(max_delay, base_delay * 2 ** attempt))
+
+
+class AdmissionController:
+    """Bounds how many requests may wait on the model at once.
+
+    Requests over the limit are rejected straight away with ServiceBusy
+    instead of tying up a worker thread behind a queue that cannot drain.
+    """
+
+    def __init__(self, max_pending=32):
+        self.max_pending = max_pending
+        self.pending = 0
+        self.rejected = 0
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_env(cls):
+        return cls(max_pending=int(os.getenv("ADMISSION_MAX_PENDING", 32)))
+
+    def __enter__(self):
+        with self._lock:
+            if self.pending >= self.max_pending:
+                self.rejected += 1
+                raise ServiceBusy("Too many requests are waiting for the model")
+            self.pending += 1
+        return self
+
+    def __exit__(self, *exc_info):
+        with self._lock:
+            self.pending -= 1
+
+    def stats(self):
+        return {'max_pending': self.max_pending, 'pending': self.pending, 'rejected': self.rejected}
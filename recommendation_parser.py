@@ -0,0 +1,145 @@
+import re
+
+RECOMMENDATION_MARKER = '--- RECOMMENDATION'
+# Used when the model drops the leading dashes from every section header
+FALLBACK_MARKER = 'RECOMMENDATION'
+
+# Field label -> (recommendation key, is comma separated list)
+COMMON_FIELDS = {
+    'TITLE': ('title', False),
+    'OVERVIEW': ('overview', False),
+    'DETAILS': ('details', False),
+    'PROS': ('pros', True),
+    'CONS': ('cons', True),
+    'RESOURCES': ('resources', True),
+}
+HIGHER_STUDY_FIELDS = dict(COMMON_FIELDS, INSTITUTIONS=('institutions', True))
+JOB_FIELDS = dict(COMMON_FIELDS, **{
+    'COMPANIES': ('companies', True),
+    'SALARY': ('salary_range', False),
+    'GROWTH': ('growth', False),
+    'SKILLS NEEDED': ('skills_needed', True),
+})
+
+COMMON_DEFAULTS = {
+    'overview': 'No overview provided.',
+    'details': 'No details provided.',
+    'pros': [],
+    'cons': [],
+    'resources': [],
+}
+HIGHER_STUDY_DEFAULTS = dict(COMMON_DEFAULTS, institutions=[])
+JOB_DEFAULTS = dict(COMMON_DEFAULTS, companies=[], salary_range='N/A', growth='N/A', skills_needed=[])
+
+
+# Characters stripped around a label before looking it up: bullets and bold markers
+LABEL_DECORATION = ' \t*-•'
+# Whitespace and the square brackets the prompt template puts around lists
+LIST_DECORATION = ' \t\r\n[]'
+
+
+def _field_pattern(fields):
+    # Longest labels first so the alternation never stops at a shorter prefix
+    labels = sorted(fields, key=len, reverse=True)
+    return re.compile('(' + '|'.join(re.escape(label) for label in labels) + '):')
+
+
+HIGHER_STUDY_PATTERN = _field_pattern(HIGHER_STUDY_FIELDS)
+JOB_PATTERN = _field_pattern(JOB_FIELDS)
+
+
+class RecommendationParser:
+    """Single-pass parser for the model's text response that can be fed in chunks.
+
+    Lines are consumed as they complete and a recommendation is returned from
+    feed() as soon as the header of the next one arrives; close() flushes the
+    last one. When the response never contains '--- RECOMMENDATION' the
+    buffered lines are split on a bare 'RECOMMENDATION' header instead. Each
+    line is matched against the leftmost field label it contains.
+    """
+
+    def __init__(self, is_higher_study):
+        if is_higher_study:
+            self._fields, self._defaults, self._pattern = HIGHER_STUDY_FIELDS, HIGHER_STUDY_DEFAULTS, HIGHER_STUDY_PATTERN
+        else:
+            self._fields, self._defaults, self._pattern = JOB_FIELDS, JOB_DEFAULTS, JOB_PATTERN
+        self._tail = ''
+        self._current = None
+        self._seen_marker = False
+        # Lines before the first marker: preamble, or the whole response in fallback mode
+        self._pending = []
+
+    def feed(self, chunk):
+        """Consume a chunk of the response and return any recommendations it completed"""
+        completed = []
+        lines = (self._tail + chunk).split('\n')
+        self._tail = lines.pop()
+        self._consume(lines, completed)
+        return completed
+
+    def close(self):
+        """Flush the remaining input and return the recommendations it completed"""
+        completed = []
+        if self._tail:
+            self._consume([self._tail], completed)
+            self._tail = ''
+        if not self._seen_marker:
+            pending, self._pending = self._pending, []
+            self._consume(pending, completed, FALLBACK_MARKER)
+        self._finish(completed)
+        return completed
+
+    def _consume(self, lines, completed, marker=RECOMMENDATION_MARKER):
+        parse_field = self._parse_field
+        for line in lines:
+            if marker in line:
+                if marker is RECOMMENDATION_MARKER and not self._seen_marker:
+                    self._seen_marker = True
+                    self._pending = []
+                parts = line.split(marker)
+                parse_field(parts[0])
+                for part in parts[1:]:
+                    self._finish(completed)
+                    self._current = {}
+                    parse_field(part)
+            elif self._seen_marker or marker is FALLBACK_MARKER:
+                if ':' in line:
+                    parse_field(line)
+            else:
+                self._pending.append(line)
+
+    def _parse_field(self, line):
+        if self._current is None:
+            return
+        # Fast path: the label sits before the first colon, possibly behind
+        # markdown bullets or bold markers, so a dict lookup finds it
+        head, _, value = line.partition(':')
+        entry = self._fields.get(head.strip(LABEL_DECORATION))
+        if entry is None:
+            match = self._pattern.search(line.replace('*', ''))
+            if match is None:
+                return
+            entry = self._fields[match.group(1)]
+            value = match.string[match.end():]
+        key, is_list = entry
+        if '*' in value:
+            value = value.replace('*', '')
+        if is_list:
+            self._current[key] = [x for x in map(str.strip, value.strip(LIST_DECORATION).split(',')) if x]
+        else:
+            self._current[key] = value.strip()
+
+    def _finish(self, completed):
+        rec, self._current = self._current, None
+        if rec and rec.get('title'):
+            # Fill in defaults for missing fields to prevent UI errors
+            for key, default in self._defaults.items():
+                if key not in rec:
+                    rec[key] = list(default) if isinstance(default, list) else default
+            completed.append(rec)
+
+
+def parse_recommendations(text_response, is_higher_study):
+    """Parse the text response into structured recommendation data"""
+    parser = RecommendationParser(is_higher_study)
+    return parser.feed(text_response) + parser.close()
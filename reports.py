@@ -0,0 +1,38 @@
+import os
+
+from jinja2 import Environment, FileSystemLoader, select_autoescape
+from markupsafe import Markup
+
+REPORT_TEMPLATE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'templates', 'reports')
+
+
+class ReportRenderer:
+    """Builds the HTML for the PDF reports from templates compiled once.
+
+    Both reports extend templates/reports/base.html. Their stylesheets live
+    in .css files next to the templates and are read once here, then handed
+    to every render as ready-made markup.
+    """
+
+    def __init__(self, template_dir=REPORT_TEMPLATE_DIR):
+        self.env = Environment(
+            loader=FileSystemLoader(template_dir),
+            autoescape=select_autoescape(['html']),
+            trim_blocks=True,
+            lstrip_blocks=True,
+            auto_reload=False,
+        )
+        self.summary_template = self.env.get_template('summary.html')
+        self.detailed_template = self.env.get_template('detailed.html')
+        self.stylesheets = {name: Markup(self.env.loader.get_source(self.env, f'{name}.css')[0])
+                            for name in ('summary', 'detailed')}
+
+    def summary(self, user_data, recommendations):
+        """HTML for the summary report covering every recommendation"""
+        return self.summary_template.render(stylesheet=self.stylesheets['summary'],
+                                            user_data=user_data, recommendations=recommendations)
+
+    def detailed(self, user_data, rec):
+        """HTML for the detailed report on a single recommendation"""
+        return self.detailed_template.render(stylesheet=self.stylesheets['detailed'],
+                                             user_data=user_data, rec=rec)
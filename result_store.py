@@ -0,0 +1,45 @@
+import os
+import secrets
+
+from cache import MemoryBackend, SQLiteBackend
+
+
+class ResultStore:
+    """Server-side store of generated results, addressed by an opaque ID.
+
+    A result is a dict holding the submitted 'user_data' and the parsed
+    'recommendations', so follow-up routes only need the ID instead of
+    round-tripping every field through hidden form inputs.
+    """
+
+    def __init__(self, backend):
+        self.backend = backend
+
+    @classmethod
+    def from_env(cls):
+        """Build the store from RESULT_STORE_* environment variables"""
+        kind = os.getenv("RESULT_STORE_BACKEND", "memory").lower()
+        ttl = int(os.getenv("RESULT_STORE_TTL", 86400))
+        size = int(os.getenv("RESULT_STORE_SIZE", 4096))
+        if kind == "sqlite":
+            path = os.getenv("RESULT_STORE_PATH", "results.sqlite3")
+            return cls(SQLiteBackend(path, max_entries=size, ttl=ttl, table='results'))
+        if kind != "memory":
+            raise ValueError(f"Unknown RESULT_STORE_BACKEND: {kind}")
+        return cls(MemoryBackend(max_entries=size, ttl=ttl))
+
+    def save(self, user_data, recommendations):
+        """Store a result and return its ID"""
+        result_id = secrets.token_urlsafe(16)
+        self.backend.set(result_id, {'user_data': user_data, 'recommendations': recommendations})
+        return result_id
+
+    def load(self, result_id):
+        """Return the stored result, or None if it is unknown or has expired"""
+        if not result_id:
+            return None
+        return self.backend.get(result_id)
+
+    def update(self, result_id, result):
+        """Replace a stored result, refreshing its TTL"""
+        self.backend.set(result_id, result)
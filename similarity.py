@@ -0,0 +1,227 @@
+import os
+import re
+import sys
+import random
+import hashlib
+import threading
+from array import array
+from collections import OrderedDict
+
+from cache import normalize_field
+
+# Free-text fields compared for similarity; goal and location must match exactly
+SIMILARITY_FIELDS = ('qualifications', 'skills', 'interests')
+
+# Splits on anything but word characters and the symbols in names like C++, C# or Node.js
+TOKEN_SPLIT = re.compile(r"[^\w+#.]+")
+STOPWORDS = frozenset(('a', 'an', 'and', 'or', 'the', 'of', 'in', 'on', 'for', 'with', 'to', 'etc'))
+
+MASK_64 = (1 << 64) - 1
+
+# Approximate CPython sizes used for the memory estimate, checked against
+# tracemalloc on 64-bit CPython 3.11: an entry (tuple, OrderedDict node, cache
+# key string and key lookup slot) excluding its signature, a bucket dict slot
+# with its hash key, a bucket set object, and one member slot in such a set
+ENTRY_BYTES = 300
+BUCKET_BYTES = 90
+BUCKET_SET_BYTES = 216
+BUCKET_MEMBER_BYTES = 40
+
+
+def profile_tokens(user_data):
+    """Order- and case-insensitive word set of the free-text profile fields"""
+    tokens = set()
+    for field in SIMILARITY_FIELDS:
+        for word in TOKEN_SPLIT.split(normalize_field(user_data.get(field))):
+            word = word.strip('.')
+            if word and word not in STOPWORDS:
+                tokens.add(f'{field}:{word}')
+    return tokens
+
+
+def age_band(age):
+    try:
+        return str(int(float(age)) // 5 * 5)
+    except (TypeError, ValueError):
+        return normalize_field(age)
+
+
+def profile_partition(user_data):
+    """Profiles are only compared with others of the same goal, location and five-year age band"""
+    return '|'.join((normalize_field(user_data.get('goal')), normalize_field(user_data.get('location')),
+                     age_band(user_data.get('age'))))
+
+
+def _token_hash(token):
+    return int.from_bytes(hashlib.blake2b(token.encode('utf-8'), digest_size=4).digest(), 'little')
+
+
+class MinHashIndex:
+    """Bounded MinHash/LSH index from profiles to the cache keys of their results.
+
+    Each profile is reduced to a MinHash signature of its tokens, split into
+    bands that are hashed into buckets. Profiles sharing a bucket are
+    candidates, and a candidate is a match when the share of equal signature
+    positions (an estimate of the Jaccard similarity of the token sets)
+    reaches the threshold. With the default 16 bands of 4 rows, profiles
+    that are 80% similar collide with a probability above 99.9%.
+
+    The index only holds signatures and keys, never the recommendations, and
+    evicts its least recently used entries beyond max_entries.
+    """
+
+    def __init__(self, threshold=0.85, num_perm=64, bands=16, max_entries=1024, max_bytes=64 * 1024 * 1024, seed=1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be a multiple of bands")
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        rng = random.Random(seed)
+        # Multiply-shift hash functions: the top 32 bits of (a * h + b) mod 2**64, with odd a
+        self._perms = [(rng.getrandbits(64) | 1, rng.getrandbits(64)) for _ in range(num_perm)]
+        self._entries = OrderedDict()  # entry id -> (cache key, partition, signature)
+        self._by_key = {}              # cache key -> entry id
+        self._buckets = {}             # band hash -> entry id, or a set of them
+        self._next_id = 0
+        self._signature_bytes = 0
+        self._set_buckets = 0
+        self._set_members = 0
+        self._lock = threading.Lock()
+        self.lookups = 0
+        self.matches = 0
+        self.evictions = 0
+
+    @classmethod
+    def from_env(cls, default_size=1024):
+        """Build the index from SIMILARITY_* environment variables, or None if disabled"""
+        if os.getenv("SIMILARITY_CACHE", "True").lower() != "true":
+            return None
+        return cls(threshold=float(os.getenv("SIMILARITY_THRESHOLD", 0.85)),
+                   num_perm=int(os.getenv("SIMILARITY_NUM_PERM", 64)),
+                   bands=int(os.getenv("SIMILARITY_BANDS", 16)),
+                   max_entries=int(os.getenv("SIMILARITY_INDEX_SIZE", default_size)),
+                   max_bytes=int(os.getenv("SIMILARITY_INDEX_MAX_MB", 64)) * 1024 * 1024)
+
+    def signature(self, tokens):
+        """MinHash signature of a token set, one 32-bit minimum per permutation"""
+        hashes = [_token_hash(token) for token in tokens] or [0]
+        return array('I', [min([(a * h + b) & MASK_64 for h in hashes]) >> 32 for a, b in self._perms])
+
+    def _band_hashes(self, partition, signature):
+        # The index lives in one process, so the salted built-in hash is fine here
+        raw = signature.tobytes()
+        width = self.rows * signature.itemsize
+        return [hash((partition, i, raw[i * width:(i + 1) * width])) for i in range(self.bands)]
+
+    def _similarity(self, a, b):
+        return sum(x == y for x, y in zip(a, b)) / self.num_perm
+
+    def _sketch(self, user_data):
+        partition = sys.intern(profile_partition(user_data))
+        signature = self.signature(profile_tokens(user_data))
+        return partition, signature, self._band_hashes(partition, signature)
+
+    # Most buckets hold a single entry, stored as a bare id instead of a set to save memory
+
+    def _bucket_add(self, band_hash, entry_id):
+        members = self._buckets.get(band_hash)
+        if members is None:
+            self._buckets[band_hash] = entry_id
+        elif isinstance(members, set):
+            members.add(entry_id)
+            self._set_members += 1
+        else:
+            self._buckets[band_hash] = {members, entry_id}
+            self._set_buckets += 1
+            self._set_members += 2
+
+    def _bucket_remove(self, band_hash, entry_id):
+        members = self._buckets.get(band_hash)
+        if isinstance(members, set):
+            members.discard(entry_id)
+            self._set_members -= 1
+            if len(members) == 1:
+                self._buckets[band_hash] = members.pop()
+                self._set_buckets -= 1
+                self._set_members -= 1
+        elif members == entry_id:
+            del self._buckets[band_hash]
+
+    def _bucket_members(self, band_hash):
+        members = self._buckets.get(band_hash)
+        if members is None:
+            return ()
+        return members if isinstance(members, set) else (members,)
+
+    def find(self, user_data):
+        """Cache key of the most similar indexed profile at or above the threshold, or None"""
+        _, signature, band_hashes = self._sketch(user_data)
+        with self._lock:
+            self.lookups += 1
+            candidates = set()
+            for band_hash in band_hashes:
+                candidates.update(self._bucket_members(band_hash))
+            best_id, best_score = None, self.threshold
+            for entry_id in candidates:
+                score = self._similarity(signature, self._entries[entry_id][2])
+                if score >= best_score:
+                    best_id, best_score = entry_id, score
+            if best_id is None:
+                return None
+            self.matches += 1
+            self._entries.move_to_end(best_id)
+            return self._entries[best_id][0]
+
+    def add(self, user_data, cache_key):
+        """Index a profile whose recommendations are cached under cache_key"""
+        partition, signature, band_hashes = self._sketch(user_data)
+        with self._lock:
+            if cache_key in self._by_key:
+                self._remove(self._by_key[cache_key])
+            entry_id = self._next_id
+            self._next_id += 1
+            # Band hashes are recomputed on removal rather than kept per entry
+            self._entries[entry_id] = (cache_key, partition, signature)
+            self._by_key[cache_key] = entry_id
+            for band_hash in band_hashes:
+                self._bucket_add(band_hash, entry_id)
+            self._signature_bytes += sys.getsizeof(signature)
+            while len(self._entries) > self.max_entries or self.approx_bytes() > self.max_bytes:
+                self._remove(next(iter(self._entries)))
+                self.evictions += 1
+
+    def discard(self, cache_key):
+        """Forget a cache key, e.g. once its recommendations have expired from the cache"""
+        with self._lock:
+            entry_id = self._by_key.get(cache_key)
+            if entry_id is not None:
+                self._remove(entry_id)
+
+    def _remove(self, entry_id):
+        cache_key, partition, signature = self._entries.pop(entry_id)
+        del self._by_key[cache_key]
+        for band_hash in self._band_hashes(partition, signature):
+            self._bucket_remove(band_hash, entry_id)
+        self._signature_bytes -= sys.getsizeof(signature)
+
+    def approx_bytes(self):
+        """Estimated memory held by the index"""
+        return (len(self._entries) * ENTRY_BYTES + self._signature_bytes + len(self._buckets) * BUCKET_BYTES
+                + self._set_buckets * BUCKET_SET_BYTES + self._set_members * BUCKET_MEMBER_BYTES)
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        return {
+            'threshold': self.threshold,
+            'entries': len(self._entries),
+            'buckets': len(self._buckets),
+            'lookups': self.lookups,
+            'matches': self.matches,
+            'evictions': self.evictions,
+            'approx_bytes': self.approx_bytes(),
+        }
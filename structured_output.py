@@ -0,0 +1,186 @@
+import re
+import json
+
+from recommendation_parser import (HIGHER_STUDY_FIELDS, JOB_FIELDS, HIGHER_STUDY_DEFAULTS, JOB_DEFAULTS,
+                                   parse_recommendations)
+
+JSON_MIME_TYPE = 'application/json'
+
+JSON_DECODER = json.JSONDecoder()
+# Start of the top-level value, and the whitespace and commas between array elements
+JSON_OPEN = re.compile(r'[\[{]')
+JSON_SEPARATOR = re.compile(r'[\s,]*')
+
+
+def _record_fields(fields):
+    # recommendation key -> is list, in the order the text format lists them
+    return {key: is_list for key, is_list in fields.values()}
+
+
+HIGHER_STUDY_RECORD = _record_fields(HIGHER_STUDY_FIELDS)
+JOB_RECORD = _record_fields(JOB_FIELDS)
+
+
+def _schema(record):
+    string = {'type': 'string'}
+    properties = {key: {'type': 'array', 'items': string} if is_list else string
+                  for key, is_list in record.items()}
+    return {'type': 'array',
+            'items': {'type': 'object', 'properties': properties, 'required': list(record)}}
+
+
+HIGHER_STUDY_SCHEMA = _schema(HIGHER_STUDY_RECORD)
+JOB_SCHEMA = _schema(JOB_RECORD)
+
+# What the results page shows for each recommendation, asked for first in progressive mode
+HIGHER_STUDY_SUMMARY_KEYS = ('title', 'overview', 'institutions')
+JOB_SUMMARY_KEYS = ('title', 'overview', 'salary_range', 'growth')
+HIGHER_STUDY_SUMMARY_SCHEMA = _schema({key: HIGHER_STUDY_RECORD[key] for key in HIGHER_STUDY_SUMMARY_KEYS})
+JOB_SUMMARY_SCHEMA = _schema({key: JOB_RECORD[key] for key in JOB_SUMMARY_KEYS})
+
+
+def generation_config(is_higher_study, summary=False):
+    """Gemini generation_config constraining the response to the goal's record schema"""
+    if summary:
+        schema = HIGHER_STUDY_SUMMARY_SCHEMA if is_higher_study else JOB_SUMMARY_SCHEMA
+    else:
+        schema = HIGHER_STUDY_SCHEMA if is_higher_study else JOB_SCHEMA
+    return {'response_mime_type': JSON_MIME_TYPE, 'response_schema': schema}
+
+
+def _as_text(value):
+    if isinstance(value, list):
+        return ', '.join(str(item).strip() for item in value if item is not None)
+    return str(value).strip()
+
+
+def _as_list(value):
+    if isinstance(value, list):
+        return [text for text in (str(item).strip() for item in value if item is not None) if text]
+    # Tolerate a comma separated string where a list was asked for
+    return [text for text in map(str.strip, str(value).split(',')) if text]
+
+
+def validate_record(data, is_higher_study):
+    """Coerce one decoded object into a recommendation, or return None if it has no title.
+
+    Unknown keys are dropped and missing or null fields get the same
+    defaults as the text parser uses.
+    """
+    if not isinstance(data, dict):
+        return None
+    record, defaults = (HIGHER_STUDY_RECORD, HIGHER_STUDY_DEFAULTS) if is_higher_study else (JOB_RECORD, JOB_DEFAULTS)
+    rec = {}
+    for key, is_list in record.items():
+        value = data.get(key)
+        if value is None:
+            continue
+        rec[key] = _as_list(value) if is_list else _as_text(value)
+    if not rec.get('title'):
+        return None
+    for key, default in defaults.items():
+        if key not in rec:
+            rec[key] = list(default) if isinstance(default, list) else default
+    return rec
+
+
+def parse_json_recommendations(text_response, is_higher_study):
+    """Decode a JSON response into validated recommendations.
+
+    Raises ValueError when the response is not JSON or holds no usable
+    recommendation.
+    """
+    text_response = text_response.strip()
+    if text_response.startswith('```'):
+        # Markdown code fence around the JSON
+        text_response = text_response.partition('\n')[2].rstrip().removesuffix('```')
+    data = json.loads(text_response)
+    if isinstance(data, dict):
+        data = data.get('recommendations')
+    if not isinstance(data, list):
+        raise ValueError("Expected a JSON array of recommendations")
+    recommendations = [rec for rec in (validate_record(item, is_higher_study) for item in data) if rec]
+    if not recommendations:
+        raise ValueError("No valid recommendations in the JSON response")
+    return recommendations
+
+
+def parse_structured_recommendations(text_response, is_higher_study):
+    """Parse a JSON-mode response, falling back to the text parser if it is not valid JSON"""
+    try:
+        return parse_json_recommendations(text_response, is_higher_study)
+    except ValueError as e:
+        print(f"Structured output rejected ({e}); falling back to the text parser")
+        return parse_recommendations(text_response, is_higher_study)
+
+
+class JsonRecommendationParser:
+    """Streaming counterpart of parse_structured_recommendations with the RecommendationParser interface.
+
+    Once the top-level array has opened, each element is decoded with
+    raw_decode as soon as a closing brace arrives after its start, so every
+    recommendation is emitted with its last chunk. Text before the array
+    (such as a code fence) is skipped. If the response turns out not to be
+    a JSON array of objects, close() parses everything received with
+    parse_structured_recommendations instead.
+    """
+
+    def __init__(self, is_higher_study):
+        self.is_higher_study = is_higher_study
+        self._buffer = []
+        self._text = ''
+        self._pos = None      # start of the next array element in _text, once the array has opened
+        self._checked = 0     # _text was incomplete up to here at the last decode attempt
+        self._emitted = 0
+        self._done = False
+
+    def feed(self, chunk):
+        """Consume a chunk of the response and return any recommendations it completed"""
+        self._buffer.append(chunk)
+        if self._done:
+            return []
+        self._text += chunk
+        completed = []
+        text = self._text
+        if self._pos is None:
+            match = JSON_OPEN.search(text)
+            if match is None:
+                return completed
+            if match.group() == '{':
+                # An object at the top level, not an array: leave it to close()
+                self._done = True
+                return completed
+            self._pos = match.end()
+        while True:
+            pos = JSON_SEPARATOR.match(text, self._pos).end()
+            if pos == len(text):
+                break
+            if text[pos] != '{':
+                # ']' ends the array; anything else means this isn't a JSON array of objects
+                self._done = True
+                break
+            if text.find('}', max(pos, self._checked)) < 0:
+                break
+            try:
+                data, end = JSON_DECODER.raw_decode(text, pos)
+            except ValueError:
+                # Incomplete so far (the brace was inside a string or closed a nested object)
+                self._checked = len(text)
+                break
+            rec = validate_record(data, self.is_higher_study)
+            if rec:
+                self._emitted += 1
+                completed.append(rec)
+            self._pos = end
+        # Drop the elements already decoded so the buffer stays small
+        self._text = text[self._pos:]
+        self._checked = max(0, self._checked - self._pos)
+        self._pos = 0
+        return completed
+
+    def close(self):
+        """Return the recommendations that only the full-response fallback can recover"""
+        if self._emitted:
+            return []
+        # Nothing usable was streamed, or the response wasn't a JSON array
+        return parse_structured_recommendations(''.join(self._buffer), self.is_higher_study)
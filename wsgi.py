@@ -0,0 +1,2 @@
+"""WSGI entry point for production servers, e.g. gunicorn wsgi:app (settings in gunicorn.conf.py)"""
+from app import app  # noqa: F401